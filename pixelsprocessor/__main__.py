@@ -7,7 +7,15 @@ import click
 from rich.console import Console
 from rich.table import Table
 
+from pixelsprocessor.context import PixelProcessingContext
+from pixelsprocessor.data import jsonbackend
 from pixelsprocessor.data.pixeldb import PixelDb, PixelDbQuery
+from pixelsprocessor.output import timeline
+from pixelsprocessor.step import StreamStep
+from pixelsprocessor.step.chunks import DEFAULT_CHUNK_SIZE, json_file_chunks, pixel_chunks
+from pixelsprocessor.step.forecast import ForecastStep
+from pixelsprocessor.step.onevar import OneVarStatsStep
+from pixelsprocessor.step.runner import STEP_TYPES, StreamRunner
 
 console = Console()
 
@@ -27,31 +35,155 @@ def main(config):
         config_data = toml.load(f)
     console.print(f"[green]Configuration file loaded from [italic]{config}[/italic][/green]\n")
 
-    # Load data from JSON file
-    datafile = config_data['data']['source']['file']
-    if not os.path.exists(datafile):
-        console.print(f'[red]Data file not found at {datafile}[/red]')
+    # Load data from JSON file(s)
+    datafiles = config_data['data']['source']['file']
+    if isinstance(datafiles, str):
+        datafiles = [datafiles]
+    for datafile in datafiles:
+        if not os.path.exists(datafile):
+            console.print(f'[red]Data file not found at {datafile}[/red]')
+            return
+    backend = config_data['data']['source'].get('backend')
+    if backend is not None and backend not in jsonbackend.available_backends():
+        console.print(f'[red]JSON backend {backend} is not installed (available: {", ".join(jsonbackend.available_backends())})[/red]')
         return
-    with open(datafile, 'r') as f:
-        db = PixelDb.from_json_str(f.read())
-    console.print(f"[green]Data file loaded from [italic]{datafile}[/italic][/green]")
-    console.print(f"  [bold]Pixel count:[/bold] {len(db.pixels)}")
-    console.print(f"  [bold]Categories:[/bold] {(db.categories)}")
-
-    # Execute initial filter query
-    query_string = config_data['data']['filtering']['query']
-    if query_string:
-        console.print(f"\n[bold]Initial query:[/bold] {query_string}")
-        query = PixelDbQuery()
-        query.parse(query_string)
-        filtered_pixels = query.execute(db)
-        console.print(f"  [bold]Filtered pixel count:[/bold] {len(filtered_pixels)}")
-        datadb = PixelDb(filtered_pixels, db.categories)
-    else:
-        datadb = db
-    
+    jsonbackend.set_backend(backend)
+
+    # Stream the data file through the processing steps without loading it, for inputs larger than memory
+    processing_config = config_data.get('processing', {})
+    query_string = config_data['data'].get('filtering', {}).get('query', '')
+    query = PixelDbQuery()
+    query.parse(query_string)
+    streaming = config_data['data']['source'].get('stream', False)
+    if streaming:
+        whole_db_steps = [name for name, step_config in processing_config.items()
+                          if isinstance(step_config, dict) and name in STEP_TYPES and not issubclass(STEP_TYPES[name], StreamStep)]
+        if len(datafiles) > 1 or whole_db_steps:
+            console.print('[red]Streaming the data file requires a single data file and only streaming processing steps[/red]')
+            return
+        console.print(f"[green]Data file streamed from [italic]{datafiles[0]}[/italic][/green]")
+        if query_string:
+            console.print(f"\n[bold]Initial query:[/bold] {query_string} (applied while streaming)")
+        datadb = None
+
+    use_mmap = config_data['data']['source'].get('mmap', False)
+    if not streaming:
+        db = PixelDb.from_json_file(datafiles[0], use_mmap=use_mmap)
+        console.print(f"[green]Data file loaded from [italic]{datafiles[0]}[/italic][/green]")
+        console.print(f"  [bold]JSON backend:[/bold] {jsonbackend.get_backend()}")
+        if use_mmap and jsonbackend.get_backend() not in jsonbackend.BUFFER_BACKENDS:
+            console.print(f"  [yellow]mmap only helps the {', '.join(sorted(jsonbackend.BUFFER_BACKENDS))} backend; the file was read normally[/yellow]")
+        for datafile in datafiles[1:]:
+            try:
+                report = db.merge(PixelDb.from_json_file(datafile, use_mmap=use_mmap), config_data['data']['source'].get('conflict', 'replace'))
+            except ValueError as e:
+                console.print(f'[red]Could not merge {datafile}: {e}[/red]')
+                return
+            console.print(f"[green]Data file merged from [italic]{datafile}[/italic][/green]")
+            console.print(f"  [bold]Added:[/bold] {report.added}  [bold]Updated:[/bold] {report.updated}  [bold]Unchanged:[/bold] {report.unchanged}  [bold]Skipped:[/bold] {report.skipped}")
+        console.print(f"  [bold]Pixel count:[/bold] {len(db.pixels)}")
+        console.print(f"  [bold]Categories:[/bold] {(db.categories)}")
+
+        # Execute initial filter query
+        if query_string:
+            console.print(f"\n[bold]Initial query:[/bold] {query_string}")
+            filtered_pixels = query.execute(db)
+            console.print(f"  [bold]Filtered pixel count:[/bold] {len(filtered_pixels)}")
+            datadb = PixelDb(filtered_pixels, db.categories)
+        else:
+            datadb = db
+
     # Execute data processing steps
-    
+    root_context = PixelProcessingContext(datadb, config_data)
+    stream_steps = []
+    for name, step_config in processing_config.items():
+        if not isinstance(step_config, dict):
+            continue  # Pipeline options such as chunk_size
+        if name not in STEP_TYPES:
+            console.print(f'[red]Unknown processing step {name}[/red]')
+            return
+        step = STEP_TYPES[name](step_config, root_context.clone())
+        if not step.check():
+            console.print(f'[red]Invalid configuration for processing step {name}[/red]')
+            return
+        if isinstance(step, StreamStep):
+            stream_steps.append((name, step))
+        else:
+            step.run()
+    onevar_config = config_data.get('output', {}).get('stats', {}).get('onevar', {})
+    if onevar_config.get('show'):
+        stream_steps.append(('onevar', OneVarStatsStep(onevar_config, root_context.clone())))
+
+    if stream_steps:
+        chunk_size = processing_config.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        tags = any(step.needs_tags for _, step in stream_steps)
+        chunks = json_file_chunks(datafiles[0], chunk_size, tags, query) if streaming else pixel_chunks(datadb, chunk_size, tags)
+        try:
+            stats = StreamRunner(stream_steps).run(chunks)
+        except ValueError as e:
+            console.print(f'[red]Processing failed: {e}[/red]')
+            return
+        table = Table(title="Processing steps")
+        table.add_column("Step")
+        table.add_column("Rows in", justify="right")
+        table.add_column("Rows out", justify="right")
+        table.add_column("Rows/s", justify="right")
+        for stage in stats:
+            table.add_row(stage.name, str(stage.rows_in), str(stage.rows_out), f"{stage.rows_per_second:,.0f}")
+        console.print()
+        console.print(table)
+
+    if onevar_config.get('show'):
+        try:
+            onevar = root_context["onevar"]
+        except KeyError:
+            onevar = None
+        if onevar is not None:
+            table = Table(title="One-variable statistics")
+            table.add_column("Statistic")
+            for column in onevar.columns:
+                table.add_column(column, justify="right")
+            for statistic, row in onevar.iterrows():
+                table.add_row(statistic, *(f"{value:.3f}" for value in row))
+            console.print()
+            console.print(table)
+
+    # Render output
+    if streaming:
+        console.print("\n[yellow]Timeline and forecast output need the whole database and are skipped when streaming[/yellow]")
+        return
+    timeline_config = config_data.get('output', {}).get('graphs', {}).get('timeline', {})
+    if timeline_config.get('show') or timeline_config.get('file') or timeline_config.get('directory'):
+        downsample = timeline_config.get('downsample', 'lttb')
+        if downsample not in timeline.DOWNSAMPLE_METHODS:
+            console.print(f'[red]Unknown timeline downsampling method {downsample} (expected one of {", ".join(timeline.DOWNSAMPLE_METHODS)})[/red]')
+            return
+        x, y = timeline.mood_series(datadb)
+        if timeline_config.get('show'):
+            console.print("\n[bold]Mood timeline:[/bold]")
+            console.print(timeline.console_timeline(x, y, console.width))
+        if timeline_config.get('file'):
+            timeline.render_timeline(x, y, timeline_config['file'], downsample)
+            console.print(f"[green]Timeline graph saved to [italic]{timeline_config['file']}[/italic][/green]")
+        if timeline_config.get('directory'):
+            paths = timeline.render_timelines(timeline.split_by_user(datadb), timeline_config['directory'], downsample)
+            console.print(f"[green]{len(paths)} per-user timeline graph(s) saved to [italic]{timeline_config['directory']}[/italic][/green]")
+
+    forecast_config = config_data.get('output', {}).get('stats', {}).get('forecast', {})
+    if forecast_config.get('show'):
+        step = ForecastStep(forecast_config, PixelProcessingContext(datadb, config_data))
+        if not step.check():
+            console.print('[red]Invalid forecast configuration[/red]')
+            return
+        forecast = step.run()
+        table = Table(title="Mood forecast")
+        table.add_column("User")
+        table.add_column("Date")
+        table.add_column("Mood", justify="right")
+        for (user, date), mood in forecast["mood"].items():
+            table.add_row(user, date.strftime("%Y-%m-%d"), f"{mood:.2f}")
+        console.print()
+        console.print(table)
 
 if __name__ == '__main__':
     main()
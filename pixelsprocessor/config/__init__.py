@@ -4,12 +4,28 @@ Pieces
 - data
     - source
         - file
-            a JSON file containing the data
+            a JSON file containing the data, or a list of (overlapping) JSON files to merge
+        - conflict (optional)
+            how merging resolves a day whose content differs between files: "replace" (default), "keep" or "error"
+        - backend (optional)
+            JSON decoder to use (orjson, simdjson or json); defaults to the fastest installed
+        - mmap (optional)
+            memory-map the data file instead of reading it; only the orjson backend can parse the mapping
+            in place, so the file is read normally with the other backends
+        - stream (optional)
+            feed a single, date-ordered data file straight into the streaming processing steps without
+            loading it, for inputs larger than memory; the filtering query is applied to the pixels as
+            they are read
     - filtering
         - query
             a query string to filter the data (SQL-like)
 - processing
     Linearly executed processing steps that cascade into one another
+    Streaming steps (tagscore, interpolation, smoothing) are pipelined over date-ordered chunks, in
+    configuration order; tagscore adds a score column per category and must come before interpolation
+    and smoothing
+    - chunk_size (optional)
+        Rows per chunk fed through the pipeline
     - type
         Parameter of the step
     - options (optional)
@@ -24,11 +40,27 @@ Pieces
         - onevar
             One-variable statistics
         - forecast
-            Mood forecast
+            Mood forecast (damped-trend exponential smoothing), per user
+            - show
+            - user (optional)
+                name to forecast pixels without a user under; defaults to "default"
+            - horizon (optional)
+                number of days to forecast
+            - alpha, beta, damping (optional)
+                smoothing parameters
+            - state (optional)
+                file the fitted model is kept in, so each run only fits the new days
     - tables
         Tables to print or export
     - graphs
         Graphs to plot or export
         - timeline
             - show
+                print a sparkline of mood over time, sized to the console (always the means of min/max/mean buckets)
+            - file (optional)
+                render the timeline graph to an image file (headless); days with several users' pixels are averaged
+            - directory (optional)
+                render one timeline graph per user to this directory, in parallel
+            - downsample (optional)
+                "lttb" (default) or "minmax" buckets, sized to the graph width
 """
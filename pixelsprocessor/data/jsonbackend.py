@@ -0,0 +1,156 @@
+"""Pluggable JSON decoding for Pixels Journal exports.
+
+The fastest installed decoder is used by default:
+- orjson
+- simdjson (pysimdjson)
+- json (standard library fallback)
+
+All backends accept bytes, so exports can be decoded straight from the file
+without first decoding them to a str. iter_array decodes an export one entry
+at a time, for files too large to hold in memory.
+"""
+
+import json
+import mmap
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+BACKENDS: Dict[str, Callable[[Union[str, bytes]], Any]] = {}
+
+try:
+    import orjson
+    BACKENDS['orjson'] = orjson.loads
+except ImportError:
+    pass
+
+try:
+    import simdjson
+    BACKENDS['simdjson'] = simdjson.loads
+except ImportError:
+    pass
+
+BACKENDS['json'] = json.loads
+
+# Backends that can parse a memoryview of an mmap without copying it to bytes first
+BUFFER_BACKENDS = {'orjson'}
+
+_backend: Optional[str] = None
+
+def available_backends() -> List[str]:
+    """Returns the names of the installed backends, fastest first."""
+    return list(BACKENDS)
+
+def get_backend() -> str:
+    """Returns the name of the backend in use."""
+    return _backend if _backend is not None else available_backends()[0]
+
+def set_backend(name: Optional[str]) -> None:
+    """Selects the backend to use.
+
+    Args:
+        name (str, optional): The name of the backend, or None to go back to the fastest installed one.
+    """
+    global _backend
+    if name is not None and name not in BACKENDS:
+        raise ValueError(f"JSON backend {name} is not available (installed: {', '.join(BACKENDS)})")
+    _backend = name
+
+def loads(data: Union[str, bytes], backend: Optional[str] = None) -> Any:
+    """Decodes a JSON document.
+
+    Args:
+        data (str | bytes): The JSON document.
+        backend (str, optional): The backend to use. Defaults to the selected backend.
+
+    Returns:
+        Any: The decoded document.
+    """
+    name = backend if backend is not None else get_backend()
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend {name} is not available (installed: {', '.join(BACKENDS)})")
+    return BACKENDS[name](data)
+
+def load_file(file_path: str, backend: Optional[str] = None, use_mmap: bool = False) -> Any:
+    """Decodes a JSON file without decoding its contents to a str.
+
+    Memory-mapping only helps backends that can parse the mapping in place
+    (those in BUFFER_BACKENDS, i.e. orjson); the others would have to copy
+    it to bytes, which is no better than reading the file, so use_mmap is
+    ignored for them.
+
+    Args:
+        file_path (str): The path to the JSON file.
+        backend (str, optional): The backend to use. Defaults to the selected backend.
+        use_mmap (bool, optional): Map the file into memory instead of reading it, if the backend supports it. Defaults to False.
+
+    Returns:
+        Any: The decoded document.
+    """
+    name = backend if backend is not None else get_backend()
+    with open(file_path, 'rb') as f:
+        if not use_mmap or name not in BUFFER_BACKENDS:
+            return loads(f.read(), name)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return loads(view, name)
+
+def iter_array(file_path: str, buffer_size: int = 1 << 16, max_value_size: int = 1 << 24) -> Iterator[Any]:
+    """Decodes a JSON file holding an array one element at a time, without loading the whole file.
+
+    Uses the standard library decoder; the other backends cannot decode incrementally.
+
+    Args:
+        file_path (str): The path to the JSON file.
+        buffer_size (int, optional): The number of characters read at a time. Defaults to 64K.
+        max_value_size (int, optional): The most characters buffered for a single element before
+            giving up, so invalid JSON does not pull the rest of the file into memory. Defaults to 16M.
+
+    Yields:
+        Any: Each element of the array.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buf, pos, eof = '', 0, False
+        expect = '['
+        while True:
+            # Skip whitespace, reading more if the buffer runs out
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                chunk = f.read(buffer_size)
+                buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            if pos >= len(buf):
+                raise ValueError(f"Unexpected end of JSON array in {file_path}")
+
+            char = buf[pos]
+            if expect == '[':
+                if char != '[':
+                    raise ValueError(f"Expected a JSON array in {file_path}")
+                pos += 1
+                expect = 'first'
+            elif char == ']' and expect in ('first', ','):
+                return
+            elif expect == ',':
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' between array elements in {file_path}")
+                pos += 1
+                expect = 'value'
+            else:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A value ending right at the end of the buffer (e.g. a number) may continue past it
+                    complete = eof or end < len(buf)
+                except json.JSONDecodeError:
+                    # Most likely the value continues past the buffer
+                    if eof:
+                        raise
+                    complete = False
+                if not complete:
+                    if len(buf) - pos >= max_value_size:
+                        raise ValueError(f"Invalid JSON or array element larger than {max_value_size} characters in {file_path}")
+                    chunk = f.read(buffer_size)
+                    buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                    continue
+                yield value
+                pos = end
+                expect = ','
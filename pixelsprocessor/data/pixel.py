@@ -2,20 +2,23 @@
 # https://github.com/pTinosq/pixelsparser/blob/main/src/pixelsparser/Pixel.py
 
 import datetime
+import hashlib
 import json
+from typing import Optional
 
 from .categorical import Category, Tag
 
 class Pixel:
     """Represents a single pixel in the Pixels Journal app."""
 
-    def __init__(self, date: datetime, mood: int, notes: str, tags: dict[Category, list[Tag]]) -> None:
+    def __init__(self, date: datetime, mood: int, notes: str, tags: dict[Category, list[Tag]], user: Optional[str] = None) -> None:
         """Initializes a Pixel object.
         """
         self.date = date
         self.mood = mood
         self.notes = notes
         self.tags = tags
+        self.user = user
 
     def __str__(self) -> str:
         """Returns a string representation of the Pixel object.
@@ -39,15 +42,42 @@ class Pixel:
         return self.date < other.date
 
     def __eq__(self, other: 'Pixel') -> bool:
-        """Compares two Pixel objects by date.
+        """Compares two Pixel objects by date (and user).
 
         Args:
             other (Pixel): The other Pixel object to compare to.
 
         Returns:
-            bool: True if this Pixel's date is equal to the other Pixel's date, False otherwise.
+            bool: True if this Pixel's date and user are equal to the other Pixel's, False otherwise.
+        """
+        if not isinstance(other, Pixel):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self) -> int:
+        """Hashes the Pixel object by date (and user), consistently with __eq__."""
+        return hash(self.key)
+
+    @property
+    def key(self) -> tuple:
+        """Returns the identity of the Pixel object: its date and user."""
+        return (self.date, self.user)
+
+    def digest(self) -> str:
+        """Returns a stable digest of the Pixel object's content (mood, notes and tags).
+
+        Two pixels with the same digest hold the same entry, regardless of tag order.
+
+        Returns:
+            str: A hex digest.
         """
-        return self.date == other.date
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps([
+            self.mood,
+            self.notes,
+            sorted([category.name, tag.name] for category, tags in self.tags.items() for tag in tags),
+        ]).encode())
+        return h.hexdigest()
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Pixel':
@@ -59,7 +89,9 @@ class Pixel:
         Returns:
             Pixel: The Pixel object created from the dictionary.
         """
-        date = datetime.datetime.strptime(data["date"], "%Y-%m-%d")
+        # Much faster than strptime, which dominates load time on large exports
+        year, month, day = data["date"].split("-")
+        date = datetime.datetime(int(year), int(month), int(day))
         mood = data["scores"][0]
         notes = data["notes"]
         tags = {}
@@ -1,11 +1,41 @@
+import bisect
 import datetime
+import functools
+import heapq
+import math
+import operator
+import os
+import pickle
 import re
-from typing import List, Callable
-import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Hashable, Iterable, List, Callable, NamedTuple, Optional, Tuple, Union
 
+import numpy as np
+
+from . import jsonbackend
 from .pixel import Pixel
 from .categorical import Category, Tag
 
+class TagIncidence(NamedTuple):
+    """Sparse pixel x tag incidence of a PixelDb.
+
+    Entry i says that pixel `pixel_ids[i]` (an index into `PixelDb.pixels`)
+    has tag `tag_ids[i]` (an index into `tags`, which holds (category name,
+    tag name) pairs).
+    """
+    pixel_ids: np.ndarray
+    tag_ids: np.ndarray
+    tags: List[Tuple[str, str]]
+
+class MergeReport(NamedTuple):
+    """Outcome of PixelDb.merge."""
+    added: int
+    updated: int
+    unchanged: int
+    skipped: int
+
+CONFLICT_POLICIES = ("replace", "keep", "error")
+
 class PixelDb:
     """Represents a database of pixels"""
 
@@ -51,21 +81,121 @@ class PixelDb:
                     tag.category = category
         self.pixels.append(pixel)
 
-    @classmethod
-    def from_json_str(cls, json_str: str) -> 'PixelDb':
-        """Creates a PixelDb object from a JSON string.
+    def merge(self, pixels: Union['PixelDb', Iterable[Pixel]],
+              conflict: Union[str, Callable[[Pixel, Pixel], Pixel]] = "replace") -> MergeReport:
+        """Merges pixels (e.g. from an overlapping export) into the database without duplicating days.
+
+        Pixels are matched by date and user. A matched pixel whose content
+        digest differs is a conflict, resolved by the conflict policy:
+        "replace" takes the incoming pixel, "keep" keeps the existing one,
+        "error" raises a ValueError, and a callable gets (existing, incoming)
+        and returns the pixel to keep. Incoming tags are moved onto this
+        database's categories, matched by name.
 
         Args:
-            json_str (str): A string of JSON data to import.
+            pixels (PixelDb | Iterable[Pixel]): The pixels to merge in.
+            conflict (str | Callable[[Pixel, Pixel], Pixel], optional): The conflict policy. Defaults to "replace".
 
         Returns:
-            PixelDb: A PixelDb object created from the JSON data.
+            MergeReport: How many pixels were added, updated, unchanged, or skipped by the conflict policy.
+        """
+        if not callable(conflict) and conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy {conflict} (expected one of {', '.join(CONFLICT_POLICIES)} or a callable)")
+        if isinstance(pixels, PixelDb):
+            pixels = pixels.pixels
+
+        categories = {category.name: category for category in self.categories}
+        index = self._merge_index()
+        added = updated = unchanged = skipped = 0
+        for incoming in pixels:
+            handle = index.get(incoming.key)
+            if handle is None:
+                index[incoming.key] = self._merge_add(self._adopt(incoming, categories))
+                added += 1
+                continue
+            # Digests only depend on category and tag names, so the incoming pixel is only adopted if it is kept
+            existing = self._merge_get(handle)
+            if existing.digest() == incoming.digest():
+                unchanged += 1
+                continue
+            if conflict == "error":
+                raise ValueError(f"Conflicting pixels for {incoming.date:%Y-%m-%d}" + (f" ({incoming.user})" if incoming.user else ""))
+            winner = incoming if conflict == "replace" else existing if conflict == "keep" else conflict(existing, incoming)
+            if winner is existing:
+                skipped += 1
+                continue
+            index[incoming.key] = self._merge_replace(handle, self._adopt(winner, categories))
+            updated += 1
+        return MergeReport(added, updated, unchanged, skipped)
+
+    def _adopt(self, pixel: Pixel, categories: Dict[str, Category]) -> Pixel:
+        """Returns a copy of a pixel whose tags belong to this database's categories (by name)."""
+        tags: Dict[Category, List[Tag]] = {}
+        for category, category_tags in pixel.tags.items():
+            own = categories.get(category.name)
+            if own is None:
+                own = categories[category.name] = Category(category.name, [])
+                self.categories.append(own)
+            for tag in category_tags:
+                own_tag = Tag(tag.name, own, tag.score)
+                own.add_tag(own_tag)
+                tags.setdefault(own, []).append(own_tag)
+        return Pixel(pixel.date, pixel.mood, pixel.notes, tags, pixel.user)
+
+    def _merge_index(self) -> dict:
+        """Returns a map from pixel key to a handle for _merge_get/_merge_replace (here, list positions)."""
+        return {pixel.key: i for i, pixel in enumerate(self.pixels)}
+
+    def _merge_get(self, handle) -> Pixel:
+        """Returns the pixel a merge handle refers to."""
+        return self.pixels[handle]
+
+    def _merge_add(self, pixel: Pixel):
+        """Adds a pixel during a merge and returns its handle."""
+        self.add_pixel(pixel)
+        return len(self.pixels) - 1
+
+    def _merge_replace(self, handle, pixel: Pixel):
+        """Replaces the pixel a merge handle refers to and returns the new handle."""
+        self.pixels[handle] = pixel
+        return handle
+
+    def tag_incidence(self) -> TagIncidence:
+        """Builds the pixel x tag incidence of the database in a single pass.
+
+        Tags are identified by category and tag name, since the same tag name
+        is stored as a separate Tag object on every pixel that has it.
+
+        Returns:
+            TagIncidence: The incidence, indexed in the order of `pixels`.
         """
+        tag_ids: Dict[Tuple[str, str], int] = {}
+        pixel_column = []
+        tag_column = []
+        for i, pixel in enumerate(self.pixels):
+            for category, tags in pixel.tags.items():
+                for tag in tags:
+                    pixel_column.append(i)
+                    tag_column.append(tag_ids.setdefault((category.name, tag.name), len(tag_ids)))
+        return TagIncidence(
+            np.array(pixel_column, dtype=np.int64),
+            np.array(tag_column, dtype=np.int64),
+            list(tag_ids),
+        )
 
-        data = json.loads(json_str)
+    @classmethod
+    def from_dicts(cls, data: List[dict]) -> 'PixelDb':
+        """Creates a PixelDb object from decoded JSON data.
 
+        Args:
+            data (List[dict]): A list of pixel dictionaries, as exported by the app.
+
+        Returns:
+            PixelDb: A PixelDb object created from the data.
+        """
         pixels = []
         categories = []
+        categories_by_name: Dict[str, Category] = {}
 
         for pixel_data in data:
             pixel = Pixel.from_dict(pixel_data)
@@ -73,9 +203,9 @@ class PixelDb:
 
             for tag_data in pixel_data['tags']:
                 category_name = tag_data['type']
-                category = next((c for c in categories if c.name == category_name), None)
+                category = categories_by_name.get(category_name)
                 if category is None:
-                    category = Category(category_name, [])
+                    category = categories_by_name[category_name] = Category(category_name, [])
                     categories.append(category)
                 for entry in tag_data['entries']:
                     tag = Tag(entry, category)
@@ -83,42 +213,523 @@ class PixelDb:
                     pixel.add_tag(tag)
 
         return cls(pixels, categories)
-    
+
     @classmethod
-    def from_json_file(cls, file_path: str) -> 'PixelDb':
+    def from_json_str(cls, json_str: Union[str, bytes], backend: Optional[str] = None) -> 'PixelDb':
+        """Creates a PixelDb object from a JSON string.
+
+        Args:
+            json_str (str | bytes): A string of JSON data to import.
+            backend (str, optional): The JSON backend to decode with. Defaults to the selected backend.
+
+        Returns:
+            PixelDb: A PixelDb object created from the JSON data.
+        """
+        return cls.from_dicts(jsonbackend.loads(json_str, backend))
+
+    @classmethod
+    def from_json_file(cls, file_path: str, backend: Optional[str] = None, use_mmap: bool = False) -> 'PixelDb':
         """Creates a PixelDb object from a JSON file.
 
         Args:
             file_path (str): The path to the JSON file to import.
+            backend (str, optional): The JSON backend to decode with. Defaults to the selected backend.
+            use_mmap (bool, optional): Map the file into memory instead of reading it. Defaults to False.
 
         Returns:
             PixelDb: A PixelDb object created from the JSON file.
         """
-        with open(file_path, 'r') as f:
-            return cls.from_json_str(f.read())
+        return cls.from_dicts(jsonbackend.load_file(file_path, backend, use_mmap))
+
+def partition_by_month(pixel: Pixel) -> Tuple[int, int]:
+    """Shard key that partitions pixels by calendar month."""
+    return (pixel.date.year, pixel.date.month)
+
+def partition_by_year(pixel: Pixel) -> int:
+    """Shard key that partitions pixels by calendar year."""
+    return pixel.date.year
+
+def partition_by_user(pixel: Pixel) -> Optional[str]:
+    """Shard key that partitions pixels by user."""
+    return pixel.user
+
+# Sort key for pixels; comparing dates directly avoids calling Pixel's comparison methods per step
+_pixel_date = operator.attrgetter("date")
+
+class PixelDbShard(PixelDb):
+    """A single partition of a ShardedPixelDb.
+
+    Pixels are kept sorted by date, and the shard maintains its own tag index
+    and mood aggregates so that it can be queried and summarized on its own.
+    The tag index maps (category name, tag name) to the pixels with that tag,
+    keyed by id() so that pixels can be removed without a scan.
+    """
+
+    def __init__(self, pixels: List[Pixel], categories: List[Category]) -> None:
+        """Initializes a PixelDbShard object.
+
+        Args:
+            pixels (List[Pixel]): The pixels in the shard.
+            categories (List[Category]): The categories of tags in the database (shared with the parent).
+        """
+        super().__init__([], categories)
+        self.tag_index: Dict[Tuple[str, str], Dict[int, Pixel]] = {}
+        self.mood_sum = 0
+        self.first_date: Optional[datetime.datetime] = None
+        self.last_date: Optional[datetime.datetime] = None
+        for pixel in pixels:
+            self.add_pixel(pixel)
+
+    def add_pixel(self, pixel: Pixel) -> None:
+        """Adds a pixel to the shard, keeping it sorted and updating the index and aggregates.
+
+        Args:
+            pixel (Pixel): The pixel to add.
+        """
+        for category, tags in pixel.tags.items():
+            if category not in self.categories:
+                self.categories.append(category)
+            for tag in tags:
+                if tag.category is None:
+                    tag.category = category
+                self.tag_index.setdefault((category.name, tag.name), {})[id(pixel)] = pixel
+        bisect.insort_right(self.pixels, pixel)
+        self.mood_sum += pixel.mood
+        if self.first_date is None or pixel.date < self.first_date:
+            self.first_date = pixel.date
+        if self.last_date is None or pixel.date > self.last_date:
+            self.last_date = pixel.date
+
+    def remove_pixel(self, pixel: Pixel) -> None:
+        """Removes a pixel (by identity) from the shard, updating the index and aggregates.
+
+        Args:
+            pixel (Pixel): The pixel to remove.
+        """
+        start = bisect.bisect_left(self.pixels, pixel)
+        end = bisect.bisect_right(self.pixels, pixel)
+        position = next(i for i in range(start, end) if self.pixels[i] is pixel)
+        del self.pixels[position]
+        for category, tags in pixel.tags.items():
+            for tag in tags:
+                key = (category.name, tag.name)
+                indexed = self.tag_index.get(key)
+                if indexed is None:
+                    continue  # Already removed via a duplicate tag
+                indexed.pop(id(pixel), None)
+                if not indexed:
+                    del self.tag_index[key]
+        self.mood_sum -= pixel.mood
+        self.first_date = self.pixels[0].date if self.pixels else None
+        self.last_date = self.pixels[-1].date if self.pixels else None
+
+    def filter_by_tag(self, tag: str) -> List[Pixel]:
+        """Filters the shard by the given tag using the tag index.
+
+        Args:
+            tag (str): The tag to filter by.
+
+        Returns:
+            List[Pixel]: A date-sorted list of Pixel objects that have a tag that matches the given tag.
+        """
+        matches: Dict[int, Pixel] = {}
+        for (_, name), pixels in self.tag_index.items():
+            if name == tag:
+                matches.update(pixels)
+        return sorted(matches.values(), key=_pixel_date)
+
+    def between(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> List[Pixel]:
+        """Returns the shard's pixels dated within an inclusive range, by bisecting the sorted pixels.
+
+        Args:
+            start (datetime, optional): The start of the range, or None for unbounded.
+            end (datetime, optional): The end of the range, or None for unbounded.
+
+        Returns:
+            List[Pixel]: The matching pixels, in date order.
+        """
+        # Pixels compare by date, so bare pixels serve as bisection probes
+        low = 0 if start is None else bisect.bisect_left(self.pixels, Pixel(start, 0, "", {}))
+        high = len(self.pixels) if end is None else bisect.bisect_right(self.pixels, Pixel(end, 0, "", {}))
+        return self.pixels[low:high]
+
+    def plan(self, filters: List[Callable[[Pixel], bool]]) -> Tuple[List[Pixel], List[Callable[[Pixel], bool]]]:
+        """Narrows a query's filters down using the shard's indexes.
+
+        Filters with a `lookup(shard)` method (TagFilter, DateFilter and their
+        combinations) are answered from the tag index and the date order;
+        the rest are returned to be applied to each remaining pixel.
+
+        Args:
+            filters (List[Callable[[Pixel], bool]]): The query's filters (all of which must pass).
+
+        Returns:
+            Tuple[List[Pixel], List[Callable[[Pixel], bool]]]: The candidate pixels in date order, and the filters still to apply to them.
+        """
+        matched: Optional[Dict[int, Pixel]] = None
+        residual = []
+        for f in filters:
+            lookup = getattr(f, "lookup", None)
+            found = lookup(self) if lookup is not None else None
+            if found is None:
+                residual.append(f)
+            else:
+                matched = found if matched is None else _intersect(matched, found)
+        if matched is None:
+            return self.pixels, residual
+        return sorted(matched.values(), key=_pixel_date), residual
+
+    @property
+    def mean_mood(self) -> Optional[float]:
+        """Returns the mean mood of the pixels in the shard, or None if it is empty."""
+        return self.mood_sum / len(self.pixels) if self.pixels else None
+
+    def overlaps(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> bool:
+        """Checks whether any pixel in the shard could fall within the given (inclusive) date range.
+
+        Args:
+            start (datetime, optional): The start of the range, or None for unbounded.
+            end (datetime, optional): The end of the range, or None for unbounded.
+
+        Returns:
+            bool: False if the shard can be skipped entirely, True otherwise.
+        """
+        if not self.pixels:
+            return False
+        if start is not None and self.last_date < start:
+            return False
+        if end is not None and self.first_date > end:
+            return False
+        return True
+
+class ShardedPixelDb(PixelDb):
+    """A PixelDb that partitions its pixels into shards (by month by default).
+
+    `add_pixel` routes a pixel to its shard, and `pixels` returns every pixel
+    in date order as a read-only tuple: add pixels with `add_pixel` or
+    `merge`, not by mutating `pixels`. PixelDbQuery prunes shards that fall
+    outside its date range and answers tag and date filters from each shard's
+    indexes. Other filters are applied to the remaining pixels, in a process
+    pool (kept until `close()` is called) once there are enough of them.
+    """
+
+    def __init__(self, pixels: List[Pixel], categories: List[Category],
+                 partition: Callable[[Pixel], Hashable] = partition_by_month,
+                 max_workers: Optional[int] = None,
+                 parallel_threshold: int = 1000000) -> None:
+        """Initializes a ShardedPixelDb object.
+
+        Args:
+            pixels (List[Pixel]): The pixels in the database.
+            categories (List[Category]): The categories of tags in the database.
+            partition (Callable[[Pixel], Hashable], optional): Maps a pixel to its shard key. Defaults to partition_by_month.
+            max_workers (int, optional): Process pool size for queries; 1 runs queries in-process. Defaults to None (CPU count).
+            parallel_threshold (int, optional): Queries whose non-indexed filters must check fewer pixels than this run in-process. Defaults to 1000000.
+        """
+        self.partition = partition
+        self.max_workers = max_workers
+        # Sending a pixel's column to a worker costs about as much as a simple filter check
+        # (~1.5us vs ~1us per pixel, measured on 200k pixels), so only very large or slow
+        # non-indexed queries gain from the pool
+        self.parallel_threshold = parallel_threshold
+        self.shards: Dict[Hashable, PixelDbShard] = {}
+        self._merged: Optional[Tuple[Pixel, ...]] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Shards share the category list, so it must exist before the pixels are routed
+        self.categories = categories
+        super().__init__(pixels, categories)
+
+    @property
+    def pixels(self) -> Tuple[Pixel, ...]:
+        """Returns all pixels across every shard, in date order (cached until the next change)."""
+        if self._merged is None:
+            self._merged = tuple(heapq.merge(*(shard.pixels for shard in self.shards.values()), key=_pixel_date))
+        return self._merged
+
+    @pixels.setter
+    def pixels(self, pixels: List[Pixel]) -> None:
+        """Replaces the contents of the database, resharding the given pixels."""
+        self.shards = {}
+        self._merged = None
+        for pixel in pixels:
+            self.add_pixel(pixel)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Returns the process pool used for queries, creating it on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self) -> None:
+        """Shuts down the query process pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def add_pixel(self, pixel: Pixel) -> None:
+        """Adds a pixel to the database, routing it to its shard.
+
+        Args:
+            pixel (Pixel): The pixel to add.
+        """
+        key = self.partition(pixel)
+        shard = self.shards.get(key)
+        if shard is None:
+            shard = self.shards[key] = PixelDbShard([], self.categories)
+        shard.add_pixel(pixel)
+        self._merged = None
+
+    def _merge_index(self) -> dict:
+        """Returns a map from pixel key to the pixel itself, which locates its shard."""
+        return {pixel.key: pixel for shard in self.shards.values() for pixel in shard.pixels}
+
+    def _merge_get(self, handle) -> Pixel:
+        """Returns the pixel a merge handle refers to."""
+        return handle
+
+    def _merge_add(self, pixel: Pixel):
+        """Adds a pixel during a merge and returns its handle."""
+        self.add_pixel(pixel)
+        return pixel
+
+    def _merge_replace(self, handle, pixel: Pixel):
+        """Replaces the pixel a merge handle refers to and returns the new handle."""
+        self.shards[self.partition(handle)].remove_pixel(handle)
+        self._merged = None
+        self.add_pixel(pixel)
+        return pixel
+
+    def filter_by_tag(self, tag: str) -> List[Pixel]:
+        """Filters the database by the given tag using each shard's tag index.
+
+        Args:
+            tag (str): The tag to filter by.
+
+        Returns:
+            List[Pixel]: A date-sorted list of Pixel objects that have a tag that matches the given tag.
+        """
+        return list(heapq.merge(*(shard.filter_by_tag(tag) for shard in self.shards.values()), key=_pixel_date))
+
+    def shards_between(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> List[PixelDbShard]:
+        """Returns the shards that may contain pixels within the given (inclusive) date range.
+
+        Args:
+            start (datetime, optional): The start of the range, or None for unbounded.
+            end (datetime, optional): The end of the range, or None for unbounded.
+
+        Returns:
+            List[PixelDbShard]: The shards that could not be pruned.
+        """
+        return [shard for shard in self.shards.values() if shard.overlaps(start, end)]
+
+def _intersect(a: Dict[int, Pixel], b: Dict[int, Pixel]) -> Dict[int, Pixel]:
+    """Returns the pixels (keyed by id) found in both a and b."""
+    if len(a) > len(b):
+        a, b = b, a
+    return {key: pixel for key, pixel in a.items() if key in b}
+
+def _lookup_all(filters: List[Callable[[Pixel], bool]], shard: 'PixelDbShard', combine: Callable) -> Optional[Dict[int, Pixel]]:
+    """Looks up every filter in a shard's indexes and combines the results, or returns None if one can't be looked up."""
+    results = []
+    for f in filters:
+        lookup = getattr(f, "lookup", None)
+        found = lookup(shard) if lookup is not None else None
+        if found is None:
+            return None
+        results.append(found)
+    return combine(results) if results else None
+
+def _union(results: List[Dict[int, Pixel]]) -> Dict[int, Pixel]:
+    """Returns the pixels (keyed by id) found in any of the results."""
+    union: Dict[int, Pixel] = {}
+    for found in results:
+        union.update(found)
+    return union
+
+PIXEL_FIELDS = ("date", "mood", "notes", "tags", "user")
+
+def _columns(pixels: List[Pixel], fields: Iterable[str]) -> Dict[str, list]:
+    """Returns the given fields of pixels as plain columns, to send to a query worker process.
+
+    Columns of builtins pickle far faster than Pixel objects, whose tags
+    would also drag every Tag of every category along (each Category lists
+    all of its tags); tags travel as (category name, tag name, score) triples.
+    """
+    columns = {}
+    for field in fields:
+        if field == "tags":
+            columns[field] = [[(category.name, tag.name, tag.score) for category, tags in pixel.tags.items() for tag in tags] for pixel in pixels]
+        else:
+            columns[field] = [getattr(pixel, field) for pixel in pixels]
+    return columns
+
+def _pixels_from_columns(columns: Dict[str, list]) -> List[Pixel]:
+    """Rebuilds pixels from the output of _columns; fields that weren't sent are None."""
+    size = len(next(iter(columns.values()), []))
+    missing = [None] * size
+    categories: Dict[str, Category] = {}
+    tags_column = []
+    for entries in columns.get("tags", [()] * size):
+        tags: Dict[Category, List[Tag]] = {}
+        for category_name, tag_name, score in entries:
+            category = categories.get(category_name)
+            if category is None:
+                category = categories[category_name] = Category(category_name, [])
+            tags.setdefault(category, []).append(Tag(tag_name, category, score))
+        tags_column.append(tags)
+    return [Pixel(*values) for values in zip(
+        columns.get("date", missing), columns.get("mood", missing), columns.get("notes", missing), tags_column, columns.get("user", missing),
+    )]
+
+def _execute_shard(filters: List[Callable[[Pixel], bool]], pixels: List[Pixel]) -> List[int]:
+    """Runs filters against the candidate pixels of one shard.
+
+    Returns indices into the candidates rather than the pixels themselves
+    so that the caller hands back its own Pixel objects, not unpickled copies.
+    """
+    matches = range(len(pixels))
+    for f in filters:
+        matches = [i for i in matches if f(pixels[i])]
+    return list(matches)
+
+def _execute_columns(filters: List[Callable[[Pixel], bool]], columns: Dict[str, list]) -> List[int]:
+    """Runs filters against one shard's candidates sent as columns (in a worker process)."""
+    return _execute_shard(filters, _pixels_from_columns(columns))
+
+def _picklable(obj) -> bool:
+    """Checks whether an object can be sent to a worker process."""
+    try:
+        pickle.dumps(obj)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
+
+class TagFilter:
+    """Filter function matching pixels that have the given tag in the given category."""
+
+    def __init__(self, category_name: str, tag_name: str) -> None:
+        self.category_name = category_name
+        self.tag_name = tag_name
+
+    fields = ("tags",)
+
+    def __call__(self, pixel: Pixel) -> bool:
+        return any(t.name == self.tag_name for tags in pixel.tags.values() for t in tags if tags[0].category.name == self.category_name)
+
+    def lookup(self, shard: PixelDbShard) -> Dict[int, Pixel]:
+        return shard.tag_index.get((self.category_name, self.tag_name), {})
+
+class DateFilter:
+    """Filter function matching pixels dated within an inclusive range (either end may be None)."""
+
+    def __init__(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> None:
+        self.start = start
+        self.end = end
+
+    fields = ("date",)
+
+    def __call__(self, pixel: Pixel) -> bool:
+        return (self.start is None or pixel.date >= self.start) and (self.end is None or pixel.date <= self.end)
+
+    def lookup(self, shard: PixelDbShard) -> Dict[int, Pixel]:
+        return {id(pixel): pixel for pixel in shard.between(self.start, self.end)}
+
+class AllFilter:
+    """Filter function matching pixels that match all of the given filters."""
+
+    def __init__(self, filters: List[Callable[[Pixel], bool]]) -> None:
+        self.filters = filters
+
+    def __call__(self, pixel: Pixel) -> bool:
+        return all(f(pixel) for f in self.filters)
+
+    def lookup(self, shard: PixelDbShard) -> Optional[Dict[int, Pixel]]:
+        return _lookup_all(self.filters, shard, lambda results: functools.reduce(_intersect, results))
+
+class AnyFilter:
+    """Filter function matching pixels that match any of the given filters."""
+
+    def __init__(self, filters: List[Callable[[Pixel], bool]]) -> None:
+        self.filters = filters
+
+    def __call__(self, pixel: Pixel) -> bool:
+        return any(f(pixel) for f in self.filters)
+
+    def lookup(self, shard: PixelDbShard) -> Optional[Dict[int, Pixel]]:
+        return _lookup_all(self.filters, shard, _union)
 
 class PixelDbQuery:
     """Represents a query on a PixelDb object."""
 
-    def __init__(self, filters = []) -> None:
+    def __init__(self, filters = [], date_range: Optional[Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]] = None) -> None:
         """Initializes a PixelDbQuery object.
 
         Args:
-            db (PixelDb): The PixelDb object to query.
+            filters (List[Callable[[Pixel], bool]], optional): Filter functions that every resulting pixel must pass.
+            date_range (Tuple[datetime, datetime], optional): Inclusive (start, end) dates used to prune shards. Either end may be None.
         """
         self.filters = filters
+        self.date_range = date_range
+
+    def between(self, start: Optional[datetime.datetime], end: Optional[datetime.datetime]) -> 'PixelDbQuery':
+        """Restricts the query to pixels dated within an inclusive range.
+
+        Args:
+            start (datetime, optional): The start of the range, or None for unbounded.
+            end (datetime, optional): The end of the range, or None for unbounded.
+
+        Returns:
+            PixelDbQuery: This query object.
+        """
+        self.date_range = (start, end)
+        self.filters = self.filters + [DateFilter(start, end)]
+        return self
 
     def execute(self, db: PixelDb) -> List[Pixel]:
         """Executes the query and returns the resulting pixels.
 
+        On a ShardedPixelDb, shards outside the date range are skipped, tag and
+        date filters are answered from each shard's indexes, and any other
+        filters are applied to the remaining pixels (in parallel once there
+        are at least `parallel_threshold` of them and the filters can be
+        pickled), with results merged in date order.
+
         Returns:
             List[Pixel]: The pixels that match the query.
         """
+        if isinstance(db, ShardedPixelDb):
+            return self._execute_sharded(db)
         filtered_pixels = db.pixels
         for f in self.filters:
             filtered_pixels = list(filter(f, filtered_pixels))
         return filtered_pixels
 
+    def _execute_sharded(self, db: ShardedPixelDb) -> List[Pixel]:
+        """Executes the query across the shards of a ShardedPixelDb."""
+        start, end = self.date_range if self.date_range is not None else (None, None)
+        plans = [shard.plan(self.filters) for shard in db.shards_between(start, end)]
+        # Filters the indexes answered fully need no further work
+        pending = [(candidates, residual) for candidates, residual in plans if residual and candidates]
+        results = [candidates for candidates, residual in plans if not residual]
+        residuals = [residual for _, residual in pending]
+        size = sum(len(candidates) for candidates, _ in pending)
+        # Filters such as lambdas can't be sent to worker processes, so they always run in-process
+        if len(pending) > 1 and db.max_workers != 1 and size >= db.parallel_threshold and _picklable(residuals):
+            # Filters may declare the pixel fields they read; only those are sent
+            fields = {field for residual in residuals for f in residual for field in getattr(f, "fields", PIXEL_FIELDS)}
+            workers = db.max_workers or os.cpu_count() or 1
+            indices = db.executor.map(
+                _execute_columns,
+                residuals,
+                [_columns(candidates, fields) for candidates, _ in pending],
+                chunksize=math.ceil(len(pending) / workers),
+            )
+        else:
+            indices = (_execute_shard(residual, candidates) for candidates, residual in pending)
+        results.extend([candidates[i] for i in idx] for (candidates, _), idx in zip(pending, indices))
+        return list(heapq.merge(*results, key=_pixel_date))
+
     class Subquery:
         """A placeholder object for a subquery filter function."""
         def __init__(self, filters=None):
@@ -137,25 +748,30 @@ class PixelDbQuery:
             PixelDbQuery: The resulting query object.
         """
         self.filters = []
+        self.date_range = None
+        date_between = re.search(r"\bDATE\s+BETWEEN\s+'(.+?)'\s+AND\s+'(.+?)'(\s+AND\s+)?", query_string, re.IGNORECASE)
+        if date_between:
+            start, end = (datetime.datetime.strptime(d, "%Y-%m-%d") for d in date_between.group(1, 2))
+            query_string = query_string[:date_between.start()] + query_string[date_between.end():]
+            self.between(start, end)
         clauses = re.findall(r"(\(.+?\)|\w+\s*=\s*'.+?')(\s+(AND|OR)\s+|\s*$)", query_string)
         for clause, _, operator in clauses:
             if clause.startswith("("):
                 self.filters.append(PixelDb.Subquery())
             elif clause.endswith(")"):
                 tag_name, tag_value = re.match(r"(\w+)\s*=\s*'(.+?)'", clause).groups()
-                subquery_filters = [lambda pixel, tag_name=tag_name, tag_value=tag_value: any(t.name == tag_value for tags in pixel.tags.values() for t in tags if tags[0].category.name == tag_name)]
+                subquery_filters = [TagFilter(tag_name, tag_value)]
                 while isinstance(self.filters[-1], PixelDb.Subquery):
                     subquery_filters.extend(self.filters.pop().filters)
                 subquery = self.filters.pop()
-                subquery.filters = [lambda pixel, subquery_filters=subquery_filters: any(f(pixel) for f in subquery_filters)]
+                subquery.filters = [AnyFilter(subquery_filters)]
                 self.filters.append(subquery)
-            else: # TODO: Implement notes CONTAINS and DATE BETWEEN
+            else: # TODO: Implement notes CONTAINS
                 tag_name, tag_value = re.match(r"(\w+)\s*=\s*'(.+?)'", clause).groups()
-                filter_function = lambda pixel, tag_name=tag_name, tag_value=tag_value: any(t.name == tag_value for tags in pixel.tags.values() for t in tags if tags[0].category.name == tag_name)
-                self.filters.append(filter_function)
+                self.filters.append(TagFilter(tag_name, tag_value))
             if operator:
                 if operator.strip().lower() == "and":
-                    filter_function = lambda pixel, filters=self.filters[-2:]: all(f(pixel) for f in filters)
+                    filter_function = AllFilter(self.filters[-2:])
                     self.filters = self.filters[:-2]
                     self.filters.append(filter_function)
                 # elif operator.strip().lower() == "or":
@@ -0,0 +1,2 @@
+"""Rendering of processed data to the console, graphs and files.
+"""
@@ -0,0 +1,237 @@
+"""Mood-over-time timeline rendering with downsampling.
+
+Long, many-user series are reduced to roughly one point per column of the
+output (pixel width for graphs, character width for the console) before
+anything is drawn, using either min/max/mean buckets or
+Largest-Triangle-Three-Buckets (LTTB).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from pixelsprocessor.data.pixeldb import PixelDb, partition_by_user
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+# Name used for pixels without a user when splitting by user
+DEFAULT_USER = "default"
+
+class Buckets(NamedTuple):
+    """Min/max/mean summary of a series split into equal-count buckets."""
+    x: np.ndarray
+    low: np.ndarray
+    mean: np.ndarray
+    high: np.ndarray
+
+def mood_series(db: PixelDb) -> Tuple[np.ndarray, np.ndarray]:
+    """Extracts the daily mood series from a database.
+
+    Days with several pixels (e.g. from several users) are averaged, so a
+    many-user database gives one point per day rather than a zigzag between
+    users; use split_by_user for one series per user.
+
+    Args:
+        db (PixelDb): The database.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Sorted dates as days since the epoch (float) and the mean mood of each day.
+    """
+    pixels = db.pixels
+    days = np.array([p.date for p in pixels], dtype='datetime64[D]').astype(np.int64)
+    moods = np.array([p.mood for p in pixels], dtype=np.float64)
+    x, inverse, counts = np.unique(days, return_inverse=True, return_counts=True)
+    return x.astype(np.float64), np.bincount(inverse, weights=moods, minlength=len(x)) / np.maximum(counts, 1)
+
+def split_by_user(db: PixelDb) -> Dict[str, PixelDb]:
+    """Splits a (merged) database into one database per user.
+
+    Args:
+        db (PixelDb): The database.
+
+    Returns:
+        Dict[str, PixelDb]: A database per user, keyed by user name (DEFAULT_USER for pixels without one).
+    """
+    pixels: Dict[str, list] = {}
+    for pixel in db.pixels:
+        user = partition_by_user(pixel)
+        pixels.setdefault(DEFAULT_USER if user is None else user, []).append(pixel)
+    return {user: PixelDb(user_pixels, db.categories) for user, user_pixels in pixels.items()}
+
+def to_datetime64(x: np.ndarray) -> np.ndarray:
+    """Converts days since the epoch (as returned by mood_series) to datetime64 for plotting."""
+    return np.round(x * 86400).astype(np.int64).astype('datetime64[s]')
+
+def bucket_count(width: int, n: int) -> int:
+    """Returns how many output points to keep for a given output width.
+
+    Args:
+        width (int): The output width in columns (pixels or characters).
+        n (int): The number of points in the series.
+
+    Returns:
+        int: The number of buckets, never more than the number of points.
+    """
+    return max(min(n, width), 0)
+
+def downsample_minmax(x: np.ndarray, y: np.ndarray, buckets: int) -> Buckets:
+    """Summarizes a series as min/max/mean over equal-count buckets.
+
+    Args:
+        x (np.ndarray): The sorted x values.
+        y (np.ndarray): The y values.
+        buckets (int): The number of buckets.
+
+    Returns:
+        Buckets: The mean x and the min, mean and max y of each bucket.
+    """
+    n = len(x)
+    buckets = min(buckets, n)
+    if buckets <= 0:
+        empty = np.empty(0)
+        return Buckets(empty, empty, empty, empty)
+    starts = np.linspace(0, n, buckets + 1).astype(np.int64)[:-1]
+    sizes = np.diff(np.append(starts, n))
+    return Buckets(
+        np.add.reduceat(x, starts) / sizes,
+        np.minimum.reduceat(y, starts),
+        np.add.reduceat(y, starts) / sizes,
+        np.maximum.reduceat(y, starts),
+    )
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsamples a series with Largest-Triangle-Three-Buckets, keeping its visual shape.
+
+    Args:
+        x (np.ndarray): The sorted x values.
+        y (np.ndarray): The y values.
+        n_out (int): The number of points to keep (the first and last points are always kept).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The selected x and y values.
+    """
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return x, y
+    if n_out < 3:
+        return x[[0, -1]], y[[0, -1]]
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+def sparkline(y: np.ndarray, low: float = 1, high: float = 5) -> str:
+    """Renders values as a single line of block characters.
+
+    Args:
+        y (np.ndarray): The values, one character each.
+        low (float, optional): The value drawn as the lowest block. Defaults to 1.
+        high (float, optional): The value drawn as the highest block. Defaults to 5.
+
+    Returns:
+        str: The sparkline.
+    """
+    levels = np.clip((y - low) / ((high - low) or 1) * (len(SPARK_CHARS) - 1), 0, len(SPARK_CHARS) - 1)
+    return "".join(SPARK_CHARS[i] for i in np.round(levels).astype(np.int64))
+
+def console_timeline(x: np.ndarray, y: np.ndarray, width: int) -> str:
+    """Renders a mood series as a dated sparkline that fits within the given width.
+
+    The sparkline always draws the means of min/max/mean buckets, one per
+    character, whichever downsampling method graphs use: LTTB picks unevenly
+    spaced points, which a fixed-width line of characters can't show.
+
+    Args:
+        x (np.ndarray): The sorted dates as days since the epoch.
+        y (np.ndarray): The moods.
+        width (int): The available width in characters.
+
+    Returns:
+        str: The first date, the sparkline of bucket means and the last date.
+    """
+    if len(x) == 0:
+        return ""
+    first, last = (str(d) for d in to_datetime64(x[[0, -1]]).astype('datetime64[D]'))
+    buckets = downsample_minmax(x, y, bucket_count(width - len(first) - len(last) - 2, len(x)))
+    return f"{first} {sparkline(buckets.mean)} {last}"
+
+def render_timeline(x: np.ndarray, y: np.ndarray, path: str, method: str = "lttb",
+                    title: Optional[str] = None, figsize: Tuple[float, float] = (10, 3), dpi: int = 100) -> None:
+    """Renders a mood series to an image file with the headless Agg backend.
+
+    Args:
+        x (np.ndarray): The sorted dates as days since the epoch.
+        y (np.ndarray): The moods.
+        path (str): The file to write; the format is taken from the extension.
+        method (str, optional): "lttb" or "minmax". Defaults to "lttb".
+        title (str, optional): The graph title. Defaults to None.
+        figsize (Tuple[float, float], optional): The figure size in inches. Defaults to (10, 3).
+        dpi (int, optional): The resolution. Defaults to 100.
+    """
+    # Figure is used directly rather than pyplot so that no GUI backend is ever selected
+    from matplotlib.figure import Figure
+
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method {method} (expected one of {', '.join(DOWNSAMPLE_METHODS)})")
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    ax = fig.add_subplot()
+    width = int(figsize[0] * dpi)
+    if method == "minmax":
+        # Each bucket draws a low and a high point, so use half as many
+        buckets = downsample_minmax(x, y, bucket_count(width // 2, len(x)))
+        ax.fill_between(to_datetime64(buckets.x), buckets.low, buckets.high, alpha=0.3, linewidth=0)
+        ax.plot(to_datetime64(buckets.x), buckets.mean, linewidth=1)
+    else:
+        xs, ys = downsample_lttb(x, y, bucket_count(width, len(x)))
+        ax.plot(to_datetime64(xs), ys, linewidth=1)
+    ax.set_ylabel("Mood")
+    if title:
+        ax.set_title(title)
+    fig.autofmt_xdate()
+    fig.savefig(path)
+
+def _render_timeline_job(args: tuple) -> str:
+    """Worker entry point for render_timelines."""
+    x, y, path, method, title = args
+    render_timeline(x, y, path, method, title)
+    return path
+
+def render_timelines(dbs: Mapping[str, PixelDb], out_dir: str, method: str = "lttb",
+                     fmt: str = "png", max_workers: Optional[int] = None) -> Mapping[str, str]:
+    """Renders one timeline per database (e.g. per user) to files in parallel.
+
+    Args:
+        dbs (Mapping[str, PixelDb]): The databases, keyed by name (used for the file name and title).
+        out_dir (str): The directory to write to; created if missing.
+        method (str, optional): "lttb" or "minmax". Defaults to "lttb".
+        fmt (str, optional): The image format / file extension. Defaults to "png".
+        max_workers (int, optional): Process pool size; 1 renders in-process. Defaults to None (CPU count).
+
+    Returns:
+        Mapping[str, str]: The written file path for each name.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = []
+    for name, db in dbs.items():
+        x, y = mood_series(db)
+        jobs.append((x, y, os.path.join(out_dir, f"{name}.{fmt}"), method, name))
+    if len(jobs) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            paths = list(executor.map(_render_timeline_job, jobs))
+    else:
+        paths = [_render_timeline_job(job) for job in jobs]
+    return dict(zip(dbs, paths))
@@ -2,7 +2,12 @@
 """
 
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+
+import pandas as pd
+
 from pixelsprocessor.context import PixelProcessingContext as Context
+from pixelsprocessor.step.chunks import pixel_chunks, empty_chunk
 
 class Step(ABC):
     """Abstract class for a procedure step."""
@@ -12,8 +17,10 @@ class Step(ABC):
 
         Args:
             config (dict): The configuration for the step.
+            context (Context): The processing context the step reads from and exports to.
         """
         self.config = config
+        self.context = context
 
     @abstractmethod
     def check(self) -> bool:
@@ -29,3 +36,64 @@ class Step(ABC):
         """Runs the step.
         """
         pass
+
+class StreamStep(Step):
+    """Abstract class for a step that processes data as a stream of chunks.
+
+    A chunk is a DataFrame of rows indexed by date; chunks arrive in date
+    order and every row of one chunk is dated after every row of the chunk
+    before it. Steps that keep state across chunks (e.g. a rolling window)
+    carry only what they need, so memory stays bounded by the chunk size.
+
+    Steps that need the whole series at once set `blocking` to True; they
+    then receive all of the data as a single chunk. Steps that need the
+    pixels' tags set `needs_tags` to True; chunk sources then add a "tags"
+    column (see pixelsprocessor.step.chunks).
+    """
+
+    blocking = False
+    needs_tags = False
+
+    @abstractmethod
+    def process(self, chunk: pd.DataFrame) -> Iterable[pd.DataFrame]:
+        """Processes one chunk.
+
+        Args:
+            chunk (pd.DataFrame): The chunk to process.
+
+        Returns:
+            Iterable[pd.DataFrame]: The resulting chunks (possibly none).
+        """
+        pass
+
+    def flush(self) -> Iterable[pd.DataFrame]:
+        """Called once after the last chunk, to emit anything still held back.
+
+        Returns:
+            Iterable[pd.DataFrame]: The remaining chunks (possibly none).
+        """
+        return ()
+
+    def stream(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Runs the step over a stream of chunks.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): The input chunks, in date order.
+
+        Yields:
+            pd.DataFrame: The output chunks, in date order.
+        """
+        if self.blocking:
+            chunks = list(chunks)
+            chunks = [pd.concat(chunks)] if chunks else []
+        for chunk in chunks:
+            yield from self.process(chunk)
+        yield from self.flush()
+
+    def run(self) -> pd.DataFrame:
+        """Runs the step over the whole database of its context.
+
+        Returns:
+            pd.DataFrame: The concatenated output.
+        """
+        return pd.concat([empty_chunk(), *self.stream(pixel_chunks(self.context.pixeldb, tags=self.needs_tags))])
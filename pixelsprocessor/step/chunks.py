@@ -0,0 +1,132 @@
+"""Sources of date-ordered chunks for streaming steps.
+
+A chunk is a DataFrame indexed by date (named "date") with a "mood" column.
+Sources can also add a "tags" column for steps that need the pixels' tags:
+each row holds a tuple of (category name, tag name, tag score) triples.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from pixelsprocessor.data import jsonbackend
+from pixelsprocessor.data.categorical import Category, Tag
+from pixelsprocessor.data.pixel import Pixel
+from pixelsprocessor.data.pixeldb import PixelDb, PixelDbQuery
+
+DEFAULT_CHUNK_SIZE = 4096
+TAGS_COLUMN = "tags"
+
+def empty_chunk() -> pd.DataFrame:
+    """Returns a chunk with no rows."""
+    return pd.DataFrame({"mood": pd.Series([], dtype=float)}, index=pd.DatetimeIndex([], name="date"))
+
+def frame_from_pixels(pixels: List[Pixel], tags: bool = False) -> pd.DataFrame:
+    """Builds a chunk from pixels.
+
+    Args:
+        pixels (List[Pixel]): The pixels, in date order.
+        tags (bool, optional): Add the "tags" column. Defaults to False.
+
+    Returns:
+        pd.DataFrame: The chunk.
+    """
+    columns = {"mood": [float(pixel.mood) for pixel in pixels]}
+    if tags:
+        columns[TAGS_COLUMN] = [
+            tuple((category.name, tag.name, tag.score) for category, category_tags in pixel.tags.items() for tag in category_tags)
+            for pixel in pixels
+        ]
+    return pd.DataFrame(columns, index=pd.DatetimeIndex([pixel.date for pixel in pixels], name="date"))
+
+def _batched(pixels: Iterable[Pixel], chunk_size: int, tags: bool = False) -> Iterator[pd.DataFrame]:
+    """Groups date-ordered pixels into chunks of about chunk_size rows.
+
+    Chunks are only cut between days, so pixels sharing a date (e.g. several
+    users' entries) always land in the same chunk; a chunk can therefore run
+    over chunk_size by the size of its last day.
+    """
+    batch = []
+    for pixel in pixels:
+        if len(batch) >= chunk_size and pixel.date != batch[-1].date:
+            yield frame_from_pixels(batch, tags)
+            batch = []
+        batch.append(pixel)
+    if batch:
+        yield frame_from_pixels(batch, tags)
+
+def pixel_chunks(db: PixelDb, chunk_size: int = DEFAULT_CHUNK_SIZE, tags: bool = False) -> Iterator[pd.DataFrame]:
+    """Streams the pixels of a database as date-ordered chunks.
+
+    Args:
+        db (PixelDb): The database.
+        chunk_size (int, optional): The number of rows per chunk (more if a day spans the cut). Defaults to 4096.
+        tags (bool, optional): Add the "tags" column. Defaults to False.
+
+    Yields:
+        pd.DataFrame: The chunks.
+    """
+    yield from _batched(sorted(db.pixels), chunk_size, tags)
+
+def json_file_pixels(file_path: str) -> Iterator[Pixel]:
+    """Decodes the pixels of an export file one at a time, with their tags.
+
+    Tags are attached to the pixels only; unlike PixelDb.from_dicts, the
+    categories don't collect every tag, so memory stays bounded.
+
+    Args:
+        file_path (str): The path to the JSON export.
+
+    Yields:
+        Pixel: The pixels, in file order.
+    """
+    categories: Dict[str, Category] = {}
+    for data in jsonbackend.iter_array(file_path):
+        pixel = Pixel.from_dict(data)
+        for tag_data in data["tags"]:
+            category = categories.get(tag_data["type"])
+            if category is None:
+                category = categories[tag_data["type"]] = Category(tag_data["type"], [])
+            for entry in tag_data["entries"]:
+                pixel.add_tag(Tag(entry, category))
+        yield pixel
+
+def filter_pixels(pixels: Iterable[Pixel], query: PixelDbQuery) -> Iterator[Pixel]:
+    """Applies a query to a date-ordered stream of pixels.
+
+    Reading stops at the first pixel past the end of the query's date range,
+    since no later pixel can match.
+
+    Args:
+        pixels (Iterable[Pixel]): The pixels, in date order.
+        query (PixelDbQuery): The query.
+
+    Yields:
+        Pixel: The pixels that match the query.
+    """
+    end = query.date_range[1] if query.date_range is not None else None
+    for pixel in pixels:
+        if end is not None and pixel.date > end:
+            return
+        if all(f(pixel) for f in query.filters):
+            yield pixel
+
+def json_file_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, tags: bool = False,
+                     query: Optional[PixelDbQuery] = None) -> Iterator[pd.DataFrame]:
+    """Streams an export file as chunks without loading it whole, for inputs larger than memory.
+
+    The export must already be in date order.
+
+    Args:
+        file_path (str): The path to the JSON export.
+        chunk_size (int, optional): The number of rows per chunk (more if a day spans the cut). Defaults to 4096.
+        tags (bool, optional): Add the "tags" column. Defaults to False.
+        query (PixelDbQuery, optional): A query the pixels must match, applied before they are framed. Defaults to None.
+
+    Yields:
+        pd.DataFrame: The chunks.
+    """
+    pixels = json_file_pixels(file_path)
+    if query is not None:
+        pixels = filter_pixels(pixels, query)
+    yield from _batched(pixels, chunk_size, tags)
@@ -0,0 +1,291 @@
+"""Step that forecasts mood with damped-trend exponential smoothing (Holt's method).
+
+The fitted state (level and trend per user) is updated incrementally with
+the days that arrived since the last run and persisted between runs, so
+history is never refit from scratch. Pixels are grouped into one series per
+user (`Pixel.user`), and all users are updated and forecast together,
+vectorized across users.
+
+Example configuration:
+```
+[output.stats.forecast]
+show = true
+horizon = 7
+alpha = 0.3
+beta = 0.1
+damping = 0.9
+state = "forecast_state.npz"
+```
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pixelsprocessor.data.pixeldb import PixelDb
+from pixelsprocessor.step import Step
+
+DEFAULT_USER = "default"
+DEFAULT_PARAMS = {"alpha": 0.3, "beta": 0.1, "damping": 0.9}
+
+def daily_mood(db: PixelDb, default_user: str = DEFAULT_USER) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Extracts the daily mood series of each user in a database.
+
+    Args:
+        db (PixelDb): The database.
+        default_user (str, optional): The user name for pixels without one. Defaults to "default".
+
+    Returns:
+        Dict[str, Tuple[np.ndarray, np.ndarray]]: Sorted days since the epoch and the mean mood of each day, per user.
+    """
+    pixels: Dict[str, list] = {}
+    for pixel in db.pixels:
+        pixels.setdefault(default_user if pixel.user is None else pixel.user, []).append(pixel)
+    series = {}
+    for user, user_pixels in pixels.items():
+        days = np.array([pixel.date for pixel in user_pixels], dtype='datetime64[D]').astype(np.int64)
+        moods = np.array([pixel.mood for pixel in user_pixels], dtype=np.float64)
+        # Several pixels on one day (e.g. from merged exports) are averaged
+        unique, inverse, counts = np.unique(days, return_inverse=True, return_counts=True)
+        series[user] = (unique, np.bincount(inverse, weights=moods, minlength=len(unique)) / counts)
+    return series
+
+class ForecastState:
+    """Fitted damped-trend exponential smoothing state for a batch of users."""
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.1, damping: float = 0.9,
+                 users: Optional[List[str]] = None, level: Optional[np.ndarray] = None,
+                 trend: Optional[np.ndarray] = None, last_day: Optional[np.ndarray] = None,
+                 first_day: Optional[np.ndarray] = None, fingerprint: str = "") -> None:
+        """Initializes a ForecastState object.
+
+        Args:
+            alpha (float, optional): Level smoothing factor. Defaults to 0.3.
+            beta (float, optional): Trend smoothing factor. Defaults to 0.1.
+            damping (float, optional): Trend damping factor (1 for an undamped trend). Defaults to 0.9.
+            users (List[str], optional): The users with fitted state. Defaults to none.
+            level (np.ndarray, optional): The level of each user.
+            trend (np.ndarray, optional): The trend of each user.
+            last_day (np.ndarray, optional): The last day (since the epoch) each user's state has seen.
+            first_day (np.ndarray, optional): The first day (since the epoch) each user's state has seen.
+            fingerprint (str, optional): Identifies the data the state was fitted on. Defaults to "".
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.damping = damping
+        self.users = list(users) if users is not None else []
+        self.level = level if level is not None else np.empty(0)
+        self.trend = trend if trend is not None else np.empty(0)
+        self.last_day = last_day if last_day is not None else np.empty(0, dtype=np.int64)
+        self.first_day = first_day if first_day is not None else np.empty(0, dtype=np.int64)
+        self.fingerprint = fingerprint
+
+    def _add_users(self, users: List[str]) -> None:
+        """Adds unfitted users to the state."""
+        self.users.extend(users)
+        self.level = np.append(self.level, np.full(len(users), np.nan))
+        self.trend = np.append(self.trend, np.zeros(len(users)))
+        self.last_day = np.append(self.last_day, np.full(len(users), np.iinfo(np.int64).min))
+        self.first_day = np.append(self.first_day, np.full(len(users), np.iinfo(np.int64).min))
+
+    def remove_users(self, users: List[str]) -> None:
+        """Drops the fitted state of the given users, so that their next update refits them from scratch.
+
+        Args:
+            users (List[str]): The users to drop; unknown users are ignored.
+        """
+        keep = np.array([user not in users for user in self.users], dtype=bool)
+        self.users = [user for user in self.users if user not in users]
+        self.level, self.trend = self.level[keep], self.trend[keep]
+        self.last_day, self.first_day = self.last_day[keep], self.first_day[keep]
+
+    def update(self, series: Mapping[str, Tuple[np.ndarray, np.ndarray]]) -> None:
+        """Updates the state with new observations.
+
+        Only days after a user's last seen day are used; earlier days are
+        assumed to have been seen by a previous update already.
+
+        Args:
+            series (Mapping[str, Tuple[np.ndarray, np.ndarray]]): Sorted (days since the epoch, moods) per user.
+        """
+        self._add_users([user for user, (days, _) in series.items() if user not in self.users and len(days)])
+        index = {user: i for i, user in enumerate(self.users)}
+
+        # Lay out the new observations as a dense (user, day) grid with NaN for missing days
+        new = {}
+        for user, (days, moods) in series.items():
+            if user not in index:
+                continue
+            keep = days > self.last_day[index[user]]
+            if keep.any():
+                new[index[user]] = (days[keep], moods[keep])
+        if not new:
+            return
+        first = min(days[0] for days, _ in new.values())
+        last = max(days[-1] for days, _ in new.values())
+        rows = np.array(list(new), dtype=np.int64)
+        grid = np.full((len(rows), last - first + 1), np.nan)
+        end = np.empty(len(rows), dtype=np.int64)
+        for row, (days, moods) in enumerate(new.values()):
+            grid[row, days - first] = moods
+            end[row] = days[-1]
+
+        # Users without state start at their first new observation
+        level, trend, last_day = self.level[rows], self.trend[rows], self.last_day[rows]
+        fresh = np.flatnonzero(np.isnan(level))
+        if len(fresh):
+            first_observed = np.argmax(~np.isnan(grid[fresh]), axis=1)
+            level[fresh] = grid[fresh, first_observed]
+            last_day[fresh] = first + first_observed
+            self.first_day[rows[fresh]] = first + first_observed
+
+        alpha, beta, phi = self.alpha, self.beta, self.damping
+        for t in range(grid.shape[1]):
+            day = first + t
+            active = (day > last_day) & (day <= end)
+            if not active.any():
+                continue
+            y = grid[active, t]
+            prev_level = level[active]
+            prev_trend = trend[active]
+            predicted = prev_level + phi * prev_trend
+            observed = ~np.isnan(y)
+            # Missing days just carry the damped trend forward
+            new_level = np.where(observed, alpha * y + (1 - alpha) * predicted, predicted)
+            new_trend = np.where(observed, beta * (new_level - prev_level) + (1 - beta) * phi * prev_trend, phi * prev_trend)
+            level[active] = new_level
+            trend[active] = new_trend
+        last_day = np.maximum(last_day, end)
+
+        self.level[rows], self.trend[rows], self.last_day[rows] = level, trend, last_day
+
+    def forecast(self, horizon: int) -> np.ndarray:
+        """Forecasts every user's mood for the days following their last seen day.
+
+        Args:
+            horizon (int): The number of days to forecast.
+
+        Returns:
+            np.ndarray: A (user, day) array of forecasts.
+        """
+        steps = np.cumsum(self.damping ** np.arange(1, horizon + 1))
+        return self.level[:, None] + steps[None, :] * self.trend[:, None]
+
+    def save(self, path: str) -> None:
+        """Saves the state to a .npz file.
+
+        Args:
+            path (str): The file to write.
+        """
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                params=np.array([self.alpha, self.beta, self.damping]),
+                users=np.array(self.users, dtype=str),
+                level=self.level,
+                trend=self.trend,
+                last_day=self.last_day,
+                first_day=self.first_day,
+                fingerprint=np.array(self.fingerprint),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> 'ForecastState':
+        """Loads a state saved with save().
+
+        Args:
+            path (str): The file to read.
+
+        Returns:
+            ForecastState: The loaded state.
+        """
+        with np.load(path) as data:
+            alpha, beta, damping = data['params']
+            # States saved before first days and fingerprints were recorded never match any data
+            first_day = data['first_day'] if 'first_day' in data.files else np.full(len(data['users']), np.iinfo(np.int64).min)
+            fingerprint = str(data['fingerprint']) if 'fingerprint' in data.files else ""
+            return cls(alpha, beta, damping, data['users'].tolist(), data['level'], data['trend'], data['last_day'], first_day, fingerprint)
+
+class ForecastStep(Step):
+    """Forecasts each user's mood over the next days, updating the persisted model state incrementally.
+
+    Pixels without a user are forecast under the configured `user` name
+    ("default" by default). The persisted state is only reused when it was
+    fitted with the same parameters, data source, filter query and user
+    name; a user is refit from scratch when their data no longer starts on
+    the same day or reaches as far, and dropped when they have no data. The
+    forecast is a DataFrame indexed by (user, date) with a "mood" column,
+    exported to the context as "forecast".
+    """
+
+    def check(self) -> bool:
+        """Checks if the configuration is valid.
+
+        Returns:
+            bool: True if the configuration is valid, False otherwise.
+        """
+        horizon = self.config.get("horizon", 7)
+        if not isinstance(horizon, int) or isinstance(horizon, bool) or horizon < 1:
+            return False
+        for key, default in DEFAULT_PARAMS.items():
+            value = self.config.get(key, default)
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 < value <= 1:
+                return False
+        return True
+
+    def _fingerprint(self) -> str:
+        """Identifies the data the forecast is fitted on: the data source, the filter query and the user."""
+        data_config = self.context.config.get("data", {})
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps([
+            data_config.get("source", {}).get("file"),
+            data_config.get("filtering", {}).get("query"),
+            self.config.get("user", DEFAULT_USER),
+        ]).encode())
+        return h.hexdigest()
+
+    def _load_state(self) -> ForecastState:
+        """Loads the persisted state, or creates a new one."""
+        path = self.config.get("state")
+        params = tuple(self.config.get(key, default) for key, default in DEFAULT_PARAMS.items())
+        fingerprint = self._fingerprint()
+        if path and os.path.exists(path):
+            state = ForecastState.load(path)
+            # Fitted state is only meaningful for the parameters and data it was fitted with
+            if np.allclose((state.alpha, state.beta, state.damping), params) and state.fingerprint == fingerprint:
+                return state
+        return ForecastState(*params, fingerprint=fingerprint)
+
+    def run(self) -> pd.DataFrame:
+        """Runs the step.
+
+        Returns:
+            pd.DataFrame: The forecast mood, indexed by user and date.
+        """
+        state = self._load_state()
+        series = daily_mood(self.context.pixeldb, self.config.get("user", DEFAULT_USER))
+        # Users whose data no longer extends the history the state has seen (e.g. an older or edited export) are refit
+        stale = []
+        for i, user in enumerate(state.users):
+            days = series.get(user, (np.empty(0),))[0]
+            if not len(days) or days[0] != state.first_day[i] or days[-1] < state.last_day[i]:
+                stale.append(user)
+        state.remove_users(stale)
+        state.update(series)
+        if self.config.get("state"):
+            state.save(self.config["state"])
+
+        horizon = self.config.get("horizon", 7)
+        moods = np.clip(state.forecast(horizon), 1, 5)
+        days = (state.last_day[:, None] + np.arange(1, horizon + 1)[None, :]).astype('datetime64[D]')
+        index = pd.MultiIndex.from_arrays(
+            [np.repeat(np.array(state.users, dtype=object), horizon), pd.DatetimeIndex(days.ravel())],
+            names=["user", "date"],
+        )
+        frame = pd.DataFrame({"mood": moods.ravel()}, index=index)
+        self.context["forecast"] = frame
+        return frame
@@ -0,0 +1,57 @@
+"""Step that fills in missing days by interpolation.
+
+Example configuration:
+```
+[processing.interpolation]
+type = "linear"
+```
+"""
+
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from pixelsprocessor.step import StreamStep
+
+INTERPOLATION_TYPES = ("linear",)
+
+class InterpolationStep(StreamStep):
+    """Resamples the data to one row per day, interpolating days without data.
+
+    The last row of each chunk is carried over to the next one so that gaps
+    spanning a chunk boundary are interpolated exactly as they would be on
+    the whole series.
+    """
+
+    def __init__(self, config: dict, context) -> None:
+        super().__init__(config, context)
+        self._carry: Optional[pd.DataFrame] = None
+
+    def check(self) -> bool:
+        """Checks if the configuration is valid.
+
+        Returns:
+            bool: True if the configuration is valid, False otherwise.
+        """
+        return self.config.get("type", "linear") in INTERPOLATION_TYPES
+
+    def process(self, chunk: pd.DataFrame) -> Iterable[pd.DataFrame]:
+        """Interpolates one chunk.
+
+        Args:
+            chunk (pd.DataFrame): The chunk to process.
+
+        Returns:
+            Iterable[pd.DataFrame]: The daily rows up to the end of the chunk.
+        """
+        if chunk.empty:
+            return []
+        if self._carry is not None and chunk.index[0] <= self._carry.index[-1]:
+            raise ValueError(f"Chunks must be date-ordered, but {chunk.index[0]:%Y-%m-%d} follows {self._carry.index[-1]:%Y-%m-%d}")
+        frame = chunk if self._carry is None else pd.concat([self._carry, chunk])
+        # Only numeric columns can be interpolated; e.g. tags don't carry over to the filled-in days
+        daily = frame.resample("D").mean(numeric_only=True).interpolate(self.config.get("type", "linear"))
+        if self._carry is not None:
+            daily = daily.iloc[1:]
+        self._carry = daily.iloc[-1:]
+        return [daily]
@@ -0,0 +1,86 @@
+"""Step that computes one-variable statistics of every column.
+
+Example configuration:
+```
+[output.stats.onevar]
+show = true
+```
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from pixelsprocessor.step import StreamStep
+
+class OneVarStatsStep(StreamStep):
+    """Accumulates count, mean, standard deviation, min and max of each column.
+
+    Chunks pass through unchanged; the running statistics are combined chunk
+    by chunk (Chan et al.'s parallel variance update), so the whole series is
+    never held in memory. The result is exported to the context as "onevar",
+    a DataFrame with one column per data column.
+    """
+
+    def __init__(self, config: dict, context) -> None:
+        super().__init__(config, context)
+        self._count = None
+        self._mean = None
+        self._m2 = None
+        self._min = None
+        self._max = None
+
+    def check(self) -> bool:
+        """Checks if the configuration is valid.
+
+        Returns:
+            bool: True if the configuration is valid, False otherwise.
+        """
+        return True
+
+    def process(self, chunk: pd.DataFrame) -> Iterable[pd.DataFrame]:
+        """Adds one chunk to the running statistics.
+
+        Args:
+            chunk (pd.DataFrame): The chunk to process.
+
+        Returns:
+            Iterable[pd.DataFrame]: The chunk, unchanged.
+        """
+        count = chunk.count()
+        if self._count is None:
+            self._count = count
+            self._mean = chunk.mean()
+            self._m2 = ((chunk - self._mean) ** 2).sum()
+            self._min = chunk.min()
+            self._max = chunk.max()
+            return [chunk]
+
+        mean = chunk.mean()
+        m2 = ((chunk - mean) ** 2).sum()
+        total = self._count + count
+        delta = (mean - self._mean).fillna(0)
+        weight = (count / total.replace(0, np.nan)).fillna(0)
+        self._mean = self._mean.fillna(mean) + delta * weight
+        self._m2 = self._m2 + m2 + delta ** 2 * self._count * weight
+        self._count = total
+        self._min = pd.concat([self._min, chunk.min()], axis=1).min(axis=1)
+        self._max = pd.concat([self._max, chunk.max()], axis=1).max(axis=1)
+        return [chunk]
+
+    def flush(self) -> Iterable[pd.DataFrame]:
+        """Exports the statistics to the context.
+
+        Returns:
+            Iterable[pd.DataFrame]: Nothing.
+        """
+        if self._count is not None:
+            self.context["onevar"] = pd.DataFrame({
+                "count": self._count,
+                "mean": self._mean,
+                "std": np.sqrt(self._m2 / (self._count - 1).replace(0, np.nan)),
+                "min": self._min,
+                "max": self._max,
+            }).T
+        return ()
@@ -0,0 +1,116 @@
+"""Runs streaming steps as a pipeline over date-ordered chunks.
+
+Each step pulls chunks from the one before it, so only a few chunks are in
+memory at any time (except around blocking steps) and inputs larger than
+memory can be processed.
+"""
+
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import pandas as pd
+
+from pixelsprocessor.step import Step, StreamStep
+from pixelsprocessor.step.interpolation import InterpolationStep
+from pixelsprocessor.step.smoothing import SmoothingStep
+from pixelsprocessor.step.tagscore import TagScoreStep
+
+# Processing step classes by configuration key
+STEP_TYPES: Dict[str, Type[Step]] = {
+    "interpolation": InterpolationStep,
+    "smoothing": SmoothingStep,
+    "tagscore": TagScoreStep,
+}
+
+class StepStats:
+    """Throughput of one stage of a pipeline."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows_in = 0
+        self.rows_out = 0
+        # Time spent in this stage alone (excluding the stages before it)
+        self.seconds = 0.0
+        # Time spent pulling from this stage, including the stages before it
+        self._inclusive_seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Returns the number of input rows processed per second."""
+        return self.rows_in / self.seconds if self.seconds > 0 else float("inf")
+
+    def __repr__(self) -> str:
+        return f"<StepStats {self.name}: {self.rows_in} rows in, {self.rows_out} rows out, {self.seconds:.3f}s>"
+
+def _metered(chunks: Iterable[pd.DataFrame], stats: StepStats) -> Iterator[pd.DataFrame]:
+    """Passes chunks through, recording the rows and time spent producing them."""
+    iterator = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            stats._inclusive_seconds += time.perf_counter() - start
+            return
+        stats._inclusive_seconds += time.perf_counter() - start
+        stats.rows_out += len(chunk)
+        yield chunk
+
+def _exported(chunks: Iterable[pd.DataFrame], path: str) -> Iterator[pd.DataFrame]:
+    """Passes chunks through, appending each to a CSV file."""
+    if os.path.exists(path):
+        os.remove(path)
+    for chunk in chunks:
+        chunk.to_csv(path, mode="a", header=not os.path.exists(path))
+        yield chunk
+
+class StreamRunner:
+    """Runs a sequence of streaming steps as a pipeline.
+
+    Example usage:
+    ```
+    runner = StreamRunner([("interpolation", interpolation), ("smoothing", smoothing)])
+    stats = runner.run(pixel_chunks(pixeldb), sink=lambda chunk: ...)
+    ```
+    A step whose config has an "export" path writes its output to that CSV file.
+    """
+
+    def __init__(self, steps: List[Tuple[str, StreamStep]]) -> None:
+        """Initializes a StreamRunner object.
+
+        Args:
+            steps (List[Tuple[str, StreamStep]]): The named steps, in pipeline order.
+        """
+        self.steps = steps
+
+    def run(self, chunks: Iterable[pd.DataFrame], sink: Optional[Callable[[pd.DataFrame], None]] = None) -> List[StepStats]:
+        """Pushes chunks through every step.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): The input chunks, in date order.
+            sink (Callable[[pd.DataFrame], None], optional): Called with each output chunk of the last step. Defaults to None.
+
+        Returns:
+            List[StepStats]: The throughput of each step.
+        """
+        source = StepStats("source")
+        stream = _metered(chunks, source)
+        stats = [source]
+        for name, step in self.steps:
+            stage = StepStats(name)
+            output = step.stream(stream)
+            if step.config.get("export"):
+                output = _exported(output, step.config["export"])
+            stream = _metered(output, stage)
+            stats.append(stage)
+
+        for chunk in stream:
+            if sink is not None:
+                sink(chunk)
+
+        # Pulling from a stage also pulls from every stage before it
+        for previous, stage in zip(stats, stats[1:]):
+            stage.rows_in = previous.rows_out
+            stage.seconds = max(stage._inclusive_seconds - previous._inclusive_seconds, 0.0)
+        return stats[1:]
@@ -0,0 +1,55 @@
+"""Step that smooths the data with a rolling mean.
+
+Example configuration:
+```
+[processing.smoothing]
+type = "rolling mean"
+points = 7
+```
+"""
+
+from typing import Iterable
+
+import pandas as pd
+
+from pixelsprocessor.step import StreamStep
+
+SMOOTHING_TYPES = ("rolling mean",)
+
+class SmoothingStep(StreamStep):
+    """Replaces each value with the mean of it and the previous `points - 1` values.
+
+    The last `points - 1` unsmoothed rows of each chunk are carried over to
+    the next one so that the result matches smoothing the whole series.
+    """
+
+    def __init__(self, config: dict, context) -> None:
+        super().__init__(config, context)
+        self._carry = None
+
+    def check(self) -> bool:
+        """Checks if the configuration is valid.
+
+        Returns:
+            bool: True if the configuration is valid, False otherwise.
+        """
+        points = self.config.get("points", 7)
+        return self.config.get("type", "rolling mean") in SMOOTHING_TYPES and isinstance(points, int) and points >= 1
+
+    def process(self, chunk: pd.DataFrame) -> Iterable[pd.DataFrame]:
+        """Smooths one chunk.
+
+        Args:
+            chunk (pd.DataFrame): The chunk to process.
+
+        Returns:
+            Iterable[pd.DataFrame]: The smoothed chunk.
+        """
+        if chunk.empty:
+            return []
+        chunk = chunk.select_dtypes("number")
+        points = self.config.get("points", 7)
+        frame = chunk if self._carry is None else pd.concat([self._carry, chunk])
+        smoothed = frame.rolling(points, min_periods=1).mean().iloc[len(frame) - len(chunk):]
+        self._carry = frame.iloc[max(len(frame) - points + 1, 0):] if points > 1 else None
+        return [smoothed]
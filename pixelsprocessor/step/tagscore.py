@@ -0,0 +1,110 @@
+"""Step that treats categorical columns (tags) as score columns.
+
+Example configuration:
+```
+[processing.tagscore]
+aggregate = "mean"
+  [processing.tagscore.scores.Emotions]
+  happiness = 5
+  chill = 4
+  sad = 1
+```
+"""
+
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pixelsprocessor.step import StreamStep
+from pixelsprocessor.step.chunks import TAGS_COLUMN
+
+AGGREGATES = ("mean", "sum", "min", "max")
+
+class TagScoreStep(StreamStep):
+    """Scores each pixel per category from a tag -> score mapping.
+
+    The pixels' tags arrive as the chunks' "tags" column, which the step
+    replaces with one numeric column per configured category, so later steps
+    (interpolation, smoothing, statistics) treat the scores like mood. It
+    must therefore run before any step that resamples or smooths the rows.
+
+    Each chunk is scored at once: scores are gathered from a tag-id -> score
+    lookup array through the chunk's row x tag incidence and reduced per
+    (category, row). Tags without a configured score fall back to
+    `Tag.score`, and are otherwise ignored. Rows with no scored tag in a
+    category get NaN.
+    """
+
+    needs_tags = True
+
+    def check(self) -> bool:
+        """Checks if the configuration is valid.
+
+        Returns:
+            bool: True if the configuration is valid, False otherwise.
+        """
+        scores = self.config.get("scores")
+        if not isinstance(scores, dict) or not scores:
+            return False
+        for tag_scores in scores.values():
+            if not isinstance(tag_scores, dict):
+                return False
+            if not all(isinstance(score, (int, float)) and not isinstance(score, bool) for score in tag_scores.values()):
+                return False
+        return self.config.get("aggregate", "mean") in AGGREGATES
+
+    def process(self, chunk: pd.DataFrame) -> Iterable[pd.DataFrame]:
+        """Scores one chunk.
+
+        Args:
+            chunk (pd.DataFrame): The chunk to process.
+
+        Returns:
+            Iterable[pd.DataFrame]: The chunk with its "tags" column replaced by the per-category score columns.
+        """
+        if TAGS_COLUMN not in chunk.columns:
+            raise ValueError("Tag scoring needs the pixels' tags; run it before steps that resample or smooth the data")
+        categories = list(self.config["scores"])
+        category_ids = {name: i for i, name in enumerate(categories)}
+        n_rows = len(chunk)
+
+        # Row x tag incidence, with tags identified by (category, name, fallback score)
+        tag_ids: Dict[Tuple[str, str, float], int] = {}
+        row_column = []
+        tag_column = []
+        for i, tags in enumerate(chunk[TAGS_COLUMN]):
+            for tag in tags:
+                row_column.append(i)
+                tag_column.append(tag_ids.setdefault(tag, len(tag_ids)))
+        row_ids = np.array(row_column, dtype=np.int64)
+
+        # Per-tag lookups: score and (scored) category, then one gather through the incidence
+        configured = self.config["scores"]
+        tag_scores = np.array(
+            [configured.get(category, {}).get(name, np.nan if score is None else score) for category, name, score in tag_ids],
+            dtype=np.float64,
+        )
+        tag_categories = np.array([category_ids.get(category, -1) for category, _, _ in tag_ids], dtype=np.int64)
+        tag_column = np.array(tag_column, dtype=np.int64)
+        scores = tag_scores[tag_column]
+        cells = tag_categories[tag_column] * n_rows + row_ids
+        valid = ~np.isnan(scores) & (cells >= 0)
+        scores, cells = scores[valid], cells[valid]
+
+        size = len(categories) * n_rows
+        counts = np.bincount(cells, minlength=size)
+        aggregate = self.config.get("aggregate", "mean")
+        if aggregate in ("mean", "sum"):
+            result = np.bincount(cells, weights=scores, minlength=size)
+            if aggregate == "mean":
+                result = result / np.maximum(counts, 1)
+        else:
+            result = np.full(size, np.inf if aggregate == "min" else -np.inf)
+            (np.minimum if aggregate == "min" else np.maximum).at(result, cells, scores)
+        result[counts == 0] = np.nan
+
+        scored = chunk.drop(columns=TAGS_COLUMN)
+        for i, category in enumerate(categories):
+            scored[category] = result[i * n_rows:(i + 1) * n_rows]
+        return [scored]
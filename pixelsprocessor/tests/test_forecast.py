@@ -0,0 +1,106 @@
+import os
+import tempfile
+import datetime
+import numpy as np
+import pytest
+from pixelsprocessor.data.pixel import Pixel
+from pixelsprocessor.data.pixeldb import PixelDb
+from pixelsprocessor.context import PixelProcessingContext
+from pixelsprocessor.step.forecast import ForecastState, ForecastStep
+
+def _series(moods, start=18000):
+    return np.arange(start, start + len(moods), dtype=np.int64), np.array(moods, dtype=float)
+
+def test_forecast_state_constant_series():
+    state = ForecastState()
+    state.update({"a": _series([3] * 20)})
+    np.testing.assert_allclose(state.forecast(5), np.full((1, 5), 3.0))
+    assert state.last_day[0] == 18019
+
+def test_forecast_state_incremental_matches_full_fit():
+    moods = [1, 2, 4, 3, 5, 5, 2, 3, 4, 4, 1, 2]
+    full = ForecastState()
+    full.update({"a": _series(moods), "b": _series(moods[::-1], 18003)})
+    incremental = ForecastState()
+    incremental.update({"a": _series(moods[:5]), "b": _series(moods[::-1][:2], 18003)})
+    # Days already seen are skipped, so passing the whole history again is fine
+    incremental.update({"a": _series(moods), "b": _series(moods[::-1], 18003)})
+    assert incremental.users == full.users
+    np.testing.assert_allclose(incremental.level, full.level)
+    np.testing.assert_allclose(incremental.trend, full.trend)
+    np.testing.assert_array_equal(incremental.last_day, full.last_day)
+
+def test_forecast_state_missing_days():
+    days = np.array([18000, 18001, 18005], dtype=np.int64)
+    state = ForecastState(alpha=0.5, beta=0.5, damping=1)
+    state.update({"a": (days, np.array([1.0, 2.0, 6.0]))})
+    # Level 1.5 / trend 0.25 after day 2, carried over three missing days, then updated with 6
+    assert state.level[0] == pytest.approx(0.5 * 6 + 0.5 * (1.5 + 4 * 0.25))
+    assert state.last_day[0] == 18005
+
+def test_forecast_state_save_load():
+    state = ForecastState(alpha=0.2)
+    state.update({"a": _series([1, 2, 3]), "b": _series([5, 4])})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.npz")
+        state.save(path)
+        loaded = ForecastState.load(path)
+    assert loaded.users == ["a", "b"]
+    assert loaded.alpha == pytest.approx(0.2)
+    np.testing.assert_allclose(loaded.forecast(3), state.forecast(3))
+
+def test_forecast_step_persists_state():
+    pixels = [Pixel(datetime.datetime(2023, 1, 1) + datetime.timedelta(days=i), 4, "", {}) for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {"horizon": 3, "state": os.path.join(tmp, "state.npz")}
+        step = ForecastStep(config, PixelProcessingContext(PixelDb(pixels[:5], []), {}))
+        assert step.check()
+        step.run()
+        frame = ForecastStep(config, PixelProcessingContext(PixelDb(pixels, []), {})).run()
+        assert ForecastState.load(config["state"]).last_day[0] == np.datetime64("2023-01-10", "D").astype(np.int64)
+    assert list(frame.loc["default"].index.strftime("%Y-%m-%d")) == ["2023-01-11", "2023-01-12", "2023-01-13"]
+    np.testing.assert_allclose(frame["mood"], 4)
+
+def test_forecast_step_check():
+    context = PixelProcessingContext(PixelDb([], []), {})
+    assert not ForecastStep({"horizon": 0}, context).check()
+    assert not ForecastStep({"alpha": 1.5}, context).check()
+    assert not ForecastStep({"horizon": True}, context).check()
+    assert ForecastStep({"alpha": 0.3, "beta": 0.1, "damping": 0.9}, context).check()
+    assert ForecastStep({}, context).run().empty
+
+def test_forecast_step_per_user():
+    start = datetime.datetime(2023, 1, 1)
+    pixels = [Pixel(start + datetime.timedelta(days=i), mood, "", {}, user=user) for user, mood in (("alice", 1), ("bob", 5)) for i in range(30)]
+    # Days with several pixels are averaged rather than the last one winning
+    pixels += [Pixel(start + datetime.timedelta(days=i), mood, "", {}) for mood in (2, 4) for i in range(10)]
+    frame = ForecastStep({"horizon": 2}, PixelProcessingContext(PixelDb(pixels, []), {})).run()
+    assert list(frame.index.get_level_values("user")) == ["alice", "alice", "bob", "bob", "default", "default"]
+    np.testing.assert_allclose(frame.loc["alice", "mood"], 1)
+    np.testing.assert_allclose(frame.loc["bob", "mood"], 5)
+    np.testing.assert_allclose(frame.loc["default", "mood"], 3)
+    assert list(frame.loc["default"].index.strftime("%Y-%m-%d")) == ["2023-01-11", "2023-01-12"]
+
+def _run(pixels, config, root_config):
+    return ForecastStep(config, PixelProcessingContext(PixelDb(pixels, []), root_config)).run()
+
+def test_forecast_step_refits_on_other_data():
+    rising = [Pixel(datetime.datetime(2023, 1, 1) + datetime.timedelta(days=i), 1 + i % 5, "", {}) for i in range(20)]
+    flat = [Pixel(datetime.datetime(2023, 1, 1) + datetime.timedelta(days=i), 2, "", {}) for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {"horizon": 2, "state": os.path.join(tmp, "state.npz")}
+        _run(rising, config, {"data": {"source": {"file": "a.json"}}})
+
+        # A different data source does not reuse the fitted state
+        frame = _run(flat, config, {"data": {"source": {"file": "b.json"}}})
+        np.testing.assert_allclose(frame["mood"], 2)
+
+        # Neither does an export that ends before the state's last day
+        _run(rising, config, {"data": {"source": {"file": "b.json"}}})
+        frame = _run(flat, config, {"data": {"source": {"file": "b.json"}}})
+        np.testing.assert_allclose(frame["mood"], 2)
+        assert ForecastState.load(config["state"]).last_day[0] == np.datetime64("2023-01-10", "D").astype(np.int64)
+
+        # Nor does one that starts on another day
+        frame = _run(flat[3:] + [Pixel(datetime.datetime(2023, 1, 11), 2, "", {})], config, {"data": {"source": {"file": "b.json"}}})
+        assert ForecastState.load(config["state"]).first_day[0] == np.datetime64("2023-01-04", "D").astype(np.int64)
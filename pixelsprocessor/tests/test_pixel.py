@@ -36,3 +36,22 @@ def test_pixel_tags_list():
     cat2 = Category("mood", [Tag("happy"), Tag("sad"), Tag("angry")])
     pixel = Pixel(datetime(2022, 1, 1), cat2.tags[0], "some notes", {cat1: [cat1.tags[0]], cat2: [cat2.tags[1], cat2.tags[2]]})
     assert pixel.tags_list == [cat1.tags[0], cat2.tags[1], cat2.tags[2]]
+
+def test_pixel_hash_and_user():
+    pixel1 = Pixel(datetime(2022, 1, 1), 3, "some notes", {})
+    pixel2 = Pixel(datetime(2022, 1, 1), 4, "other notes", {})
+    pixel3 = Pixel(datetime(2022, 1, 1), 3, "some notes", {}, user="alice")
+    assert hash(pixel1) == hash(pixel2)
+    assert len({pixel1, pixel2, pixel3}) == 2
+    assert pixel1 != pixel3
+    assert pixel1 != None
+    assert pixel1 != "2022-01-01"
+
+def test_pixel_digest():
+    cat1 = Category("color", [Tag("red"), Tag("green")])
+    pixel1 = Pixel(datetime(2022, 1, 1), 3, "some notes", {cat1: [cat1.tags[0], cat1.tags[1]]})
+    pixel2 = Pixel(datetime(2022, 1, 2), 3, "some notes", {cat1: [cat1.tags[1], cat1.tags[0]]})
+    pixel3 = Pixel(datetime(2022, 1, 1), 3, "some notes", {cat1: [cat1.tags[0]]})
+    assert pixel1.digest() == pixel2.digest()
+    assert pixel1.digest() != pixel3.digest()
+    assert pixel1.digest() != Pixel(datetime(2022, 1, 1), 4, "some notes", pixel1.tags).digest()
@@ -1,9 +1,11 @@
+import pytest
 import os
 import tempfile
 import datetime
 from pixelsprocessor.data.categorical import Category, Tag
+from pixelsprocessor.data import jsonbackend
 from pixelsprocessor.data.pixel import Pixel
-from pixelsprocessor.data.pixeldb import PixelDb, PixelDbQuery
+from pixelsprocessor.data.pixeldb import MergeReport, PixelDb, PixelDbQuery, ShardedPixelDb, _columns, _pixels_from_columns
 
 def test_pixeldb_add_pixel():
     db = PixelDb.from_json_str('[{"date": "2023-5-23","type": "Mood","scores": [4],"notes": "Band banquet","tags": [{"type": "Emotions","entries": ["chill","happiness"]}]}]')
@@ -32,3 +34,194 @@ def test_pixeldbquery_execute_categorical():
     assert len(filtered_pixels) == 1
     assert filtered_pixels[0] == pixel1
 
+
+def _sharded_db(max_workers=1, parallel_threshold=100000):
+    cat1 = Category("color", [Tag("red"), Tag("green"), Tag("blue")])
+    pixels = [
+        Pixel(datetime.datetime(2022, 2, 3), 2, "feb", {cat1: [cat1.tags[1]]}),
+        Pixel(datetime.datetime(2022, 1, 1), 1, "jan", {cat1: [cat1.tags[0]]}),
+        Pixel(datetime.datetime(2022, 3, 5), 3, "mar", {cat1: [cat1.tags[0]]}),
+        Pixel(datetime.datetime(2022, 1, 20), 5, "jan 2", {cat1: [cat1.tags[0]]}),
+    ]
+    return ShardedPixelDb(pixels, [cat1], max_workers=max_workers, parallel_threshold=parallel_threshold)
+
+def test_shardedpixeldb_routing():
+    db = _sharded_db()
+    assert sorted(db.shards) == [(2022, 1), (2022, 2), (2022, 3)]
+    assert [p.notes for p in db.pixels] == ["jan", "jan 2", "feb", "mar"]
+    assert db.shards[(2022, 1)].mean_mood == 3
+    db.add_pixel(Pixel(datetime.datetime(2022, 1, 10), 4, "jan 3", {}))
+    assert [p.notes for p in db.shards[(2022, 1)].pixels] == ["jan", "jan 3", "jan 2"]
+    assert [p.notes for p in db.filter_by_tag("red")] == ["jan", "jan 2", "mar"]
+
+def test_shardedpixeldb_from_json_str():
+    db = ShardedPixelDb.from_json_str('[{"date": "2023-5-23","type": "Mood","scores": [4],"notes": "Band banquet","tags": [{"type": "Emotions","entries": ["chill","happiness"]}]}]')
+    assert list(db.shards) == [(2023, 5)]
+    assert len(db.pixels) == 1
+    assert len(db.categories) == 1
+
+def test_pixeldbquery_date_between_prunes_shards():
+    db = _sharded_db()
+    query = PixelDbQuery().parse("WHERE DATE BETWEEN '2022-01-15' AND '2022-02-28' AND color='red'")
+    assert query.date_range == (datetime.datetime(2022, 1, 15), datetime.datetime(2022, 2, 28))
+    assert len(db.shards_between(*query.date_range)) == 2
+    assert [p.notes for p in query.execute(db)] == ["jan 2"]
+    # The same query gives the same answer on a flat database
+    flat = PixelDb(db.pixels, db.categories)
+    assert [p.notes for p in query.execute(flat)] == ["jan 2"]
+
+class _MoodAtLeast:
+    fields = ("mood",)
+
+    def __init__(self, mood):
+        self.mood = mood
+
+    def __call__(self, pixel):
+        return pixel.mood >= self.mood
+
+def test_pixeldbquery_execute_sharded_parallel():
+    db = _sharded_db(max_workers=2, parallel_threshold=0)
+    try:
+        query = PixelDbQuery().parse("WHERE color='red'")
+        query.filters.append(_MoodAtLeast(2))
+        filtered_pixels = query.execute(db)
+        assert [p.notes for p in filtered_pixels] == ["jan 2", "mar"]
+        assert filtered_pixels[0] is db.shards[(2022, 1)].pixels[1]
+        # The pool is reused across queries
+        executor = db.executor
+        assert len(query.execute(db)) == 2
+        assert db.executor is executor
+        # Filters that can't be pickled run in-process instead
+        assert [p.notes for p in PixelDbQuery([lambda p: p.mood >= 3]).execute(db)] == ["jan 2", "mar"]
+    finally:
+        db.close()
+
+def test_shardedpixeldb_tag_index_answers_queries():
+    db = _sharded_db()
+    shard = db.shards[(2022, 1)]
+    assert sorted(shard.tag_index) == [("color", "red")]
+    query = PixelDbQuery().parse("WHERE DATE BETWEEN '2022-01-15' AND '2022-02-28' AND color='red'")
+    candidates, residual = shard.plan(query.filters)
+    assert [p.notes for p in candidates] == ["jan 2"]
+    assert residual == []
+    shard.remove_pixel(shard.pixels[0])
+    assert [p.notes for p in db.filter_by_tag("red")] == ["jan 2", "mar"]
+    assert [p.notes for p in shard.plan([_MoodAtLeast(1)])[0]] == ["jan 2"]
+
+def test_shardedpixeldb_worker_columns():
+    db = _sharded_db()
+    pixels = db.shards[(2022, 1)].pixels
+    columns = _columns(pixels, ("mood", "tags"))
+    assert sorted(columns) == ["mood", "tags"]
+    rebuilt = _pixels_from_columns(columns)
+    assert [p.mood for p in rebuilt] == [1, 5]
+    assert rebuilt[0].date is None and rebuilt[0].notes is None
+    assert [(t.category.name, t.name) for t in rebuilt[0].tags_list] == [("color", "red")]
+
+def test_pixeldbquery_parse_resets_date_range():
+    db = _sharded_db()
+    query = PixelDbQuery().parse("WHERE DATE BETWEEN '2022-01-01' AND '2022-01-31' AND color='red'")
+    assert len(query.execute(db)) == 2
+    query.parse("WHERE color='red'")
+    assert query.date_range is None
+    assert [p.notes for p in query.execute(db)] == ["jan", "jan 2", "mar"]
+
+def test_shardedpixeldb_pixels_read_only():
+    db = _sharded_db()
+    pixels = db.pixels
+    assert isinstance(pixels, tuple)
+    assert db.pixels is pixels
+    with pytest.raises(AttributeError):
+        db.pixels.append(Pixel(datetime.datetime(2022, 4, 1), 1, "", {}))
+    db.add_pixel(Pixel(datetime.datetime(2022, 4, 1), 1, "apr", {}))
+    assert db.pixels[-1].notes == "apr"
+
+@pytest.mark.parametrize("backend", jsonbackend.available_backends())
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_pixeldb_from_json_file_backends(backend, use_mmap):
+    data = b'[{"date": "2023-5-23","type": "Mood","scores": [4],"notes": "Band banquet","tags": [{"type": "Emotions","entries": ["chill","happiness"]}]}]'
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        f.write(data)
+    try:
+        db = PixelDb.from_json_file(f.name, backend=backend, use_mmap=use_mmap)
+    finally:
+        os.remove(f.name)
+    assert db.pixels[0].date == datetime.datetime(2023, 5, 23)
+    assert db.pixels[0].mood == 4
+    assert [t.name for t in db.pixels[0].tags_list] == ["chill", "happiness"]
+    assert [c.name for c in db.categories] == ["Emotions"]
+    assert PixelDb.from_json_str(data, backend=backend).pixels[0].notes == "Band banquet"
+
+def test_jsonbackend_mmap_only_for_buffer_backends(monkeypatch):
+    def no_mmap(*args, **kwargs):
+        raise AssertionError("mmap used")
+    monkeypatch.setattr(jsonbackend.mmap, "mmap", no_mmap)
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        f.write(b'[1, 2]')
+    try:
+        assert jsonbackend.load_file(f.name, "json", use_mmap=True) == [1, 2]
+    finally:
+        os.remove(f.name)
+
+def test_jsonbackend_selection():
+    assert jsonbackend.available_backends()[-1] == "json"
+    jsonbackend.set_backend("json")
+    try:
+        assert jsonbackend.get_backend() == "json"
+    finally:
+        jsonbackend.set_backend(None)
+    assert jsonbackend.get_backend() == jsonbackend.available_backends()[0]
+    with pytest.raises(ValueError):
+        jsonbackend.set_backend("nonexistent")
+
+EXPORT_A = '''[
+    {"date": "2023-5-22","type": "Mood","scores": [3],"notes": "","tags": [{"type": "Emotions","entries": ["chill"]}]},
+    {"date": "2023-5-23","type": "Mood","scores": [4],"notes": "Band banquet","tags": [{"type": "Emotions","entries": ["chill","happiness"]}]}
+]'''
+EXPORT_B = '''[
+    {"date": "2023-5-23","type": "Mood","scores": [4],"notes": "Band banquet","tags": [{"type": "Emotions","entries": ["happiness","chill"]}]},
+    {"date": "2023-5-22","type": "Mood","scores": [2],"notes": "Edited","tags": [{"type": "Emotions","entries": ["sad"]}]},
+    {"date": "2023-5-24","type": "Mood","scores": [5],"notes": "","tags": [{"type": "Weather","entries": ["sun"]}]},
+    {"date": "2023-5-24","type": "Mood","scores": [5],"notes": "","tags": [{"type": "Weather","entries": ["sun"]}]}
+]'''
+
+@pytest.mark.parametrize("db_class", [PixelDb, ShardedPixelDb])
+def test_pixeldb_merge(db_class):
+    db = db_class.from_json_str(EXPORT_A)
+    report = db.merge(PixelDb.from_json_str(EXPORT_B))
+    assert report == MergeReport(added=1, updated=1, unchanged=2, skipped=0)
+    pixels = sorted(db.pixels)
+    assert [p.mood for p in pixels] == [2, 4, 5]
+    assert pixels[0].notes == "Edited"
+    assert [c.name for c in db.categories] == ["Emotions", "Weather"]
+    assert pixels[0].tags_list[0].category is db.categories[0]
+    assert [p.notes for p in db.filter_by_tag("chill")] == ["Band banquet"]
+
+@pytest.mark.parametrize("db_class", [PixelDb, ShardedPixelDb])
+def test_pixeldb_merge_no_orphan_tags(db_class):
+    db = db_class.from_json_str(EXPORT_A)
+    tag_count = len(db.categories[0].tags)
+    for _ in range(3):
+        assert db.merge(PixelDb.from_json_str(EXPORT_A)) == MergeReport(0, 0, 2, 0)
+    assert db.merge(PixelDb.from_json_str(EXPORT_B), conflict="keep").updated == 0
+    assert len(db.categories[0].tags) == tag_count
+
+def test_pixeldb_merge_conflict_policies():
+    db = PixelDb.from_json_str(EXPORT_A)
+    assert db.merge(PixelDb.from_json_str(EXPORT_B), conflict="keep") == MergeReport(1, 0, 2, 1)
+    assert sorted(db.pixels)[0].mood == 3
+    with pytest.raises(ValueError):
+        PixelDb.from_json_str(EXPORT_A).merge(PixelDb.from_json_str(EXPORT_B), conflict="error")
+    with pytest.raises(ValueError):
+        db.merge([], conflict="newest")
+    db = PixelDb.from_json_str(EXPORT_A)
+    report = db.merge(PixelDb.from_json_str(EXPORT_B), conflict=lambda existing, incoming: max(existing, incoming, key=lambda p: p.mood))
+    assert report == MergeReport(1, 0, 2, 1)
+
+def test_pixeldb_merge_by_user():
+    db = PixelDb.from_json_str(EXPORT_A)
+    other = PixelDb.from_json_str(EXPORT_A).pixels
+    for pixel in other:
+        pixel.user = "alice"
+    assert db.merge(other) == MergeReport(2, 0, 0, 0)
+    assert len(db.pixels) == 4
@@ -0,0 +1,172 @@
+import os
+import json
+import tempfile
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from pixelsprocessor.data import jsonbackend
+from pixelsprocessor.data.pixel import Pixel
+from pixelsprocessor.data.pixeldb import PixelDb, PixelDbQuery
+from pixelsprocessor.context import PixelProcessingContext
+from pixelsprocessor.step import StreamStep
+from pixelsprocessor.step.chunks import filter_pixels, pixel_chunks, json_file_chunks
+from pixelsprocessor.step.interpolation import InterpolationStep
+from pixelsprocessor.step.smoothing import SmoothingStep
+from pixelsprocessor.step.onevar import OneVarStatsStep
+from pixelsprocessor.step.runner import StreamRunner
+from pixelsprocessor.step.tagscore import TagScoreStep
+
+@pytest.fixture
+def pixeldb():
+    # Every third day is missing
+    start = datetime.datetime(2022, 1, 1)
+    return PixelDb([Pixel(start + datetime.timedelta(days=i), 1 + (i * 7) % 5, "", {}) for i in range(100) if i % 3 != 2], [])
+
+@pytest.fixture
+def context(pixeldb):
+    return PixelProcessingContext(pixeldb, {})
+
+def _collect(runner, chunks):
+    out = []
+    stats = runner.run(chunks, sink=out.append)
+    return pd.concat(out), stats
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_pipeline_matches_whole_series(pixeldb, context, chunk_size):
+    runner = StreamRunner([
+        ("interpolation", InterpolationStep({"type": "linear"}, context.clone())),
+        ("smoothing", SmoothingStep({"type": "rolling mean", "points": 7}, context.clone())),
+        ("onevar", OneVarStatsStep({}, context.clone())),
+    ])
+    result, stats = _collect(runner, pixel_chunks(pixeldb, chunk_size))
+
+    whole = next(pixel_chunks(pixeldb, 1000))
+    expected = whole.resample("D").mean().interpolate("linear").rolling(7, min_periods=1).mean()
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+
+    onevar = context["onevar"]
+    assert onevar.loc["count", "mood"] == 100
+    assert onevar.loc["mean", "mood"] == pytest.approx(expected["mood"].mean())
+    assert onevar.loc["std", "mood"] == pytest.approx(expected["mood"].std())
+    assert onevar.loc["min", "mood"] == expected["mood"].min()
+
+    assert [s.name for s in stats] == ["interpolation", "smoothing", "onevar"]
+    assert [(s.rows_in, s.rows_out) for s in stats] == [(67, 100), (100, 100), (100, 100)]
+    assert all(s.rows_per_second > 0 for s in stats)
+
+def test_pipeline_rejects_unordered_chunks(context):
+    step = InterpolationStep({}, context)
+    chunks = [pd.DataFrame({"mood": [1.0]}, index=pd.DatetimeIndex([d], name="date")) for d in ("2022-01-05", "2022-01-01")]
+    with pytest.raises(ValueError):
+        list(step.stream(chunks))
+
+def test_blocking_step(pixeldb, context):
+    class Rank(StreamStep):
+        blocking = True
+        def check(self):
+            return True
+        def process(self, chunk):
+            self.chunks_seen = getattr(self, "chunks_seen", 0) + 1
+            return [chunk.rank()]
+
+    step = Rank({}, context)
+    result, stats = _collect(StreamRunner([("rank", step)]), pixel_chunks(pixeldb, 5))
+    assert step.chunks_seen == 1
+    pd.testing.assert_frame_equal(result, next(pixel_chunks(pixeldb, 1000)).rank())
+    assert stats[0].rows_in == 67
+
+def test_stream_step_run(context):
+    frame = SmoothingStep({"points": 2}, context).run()
+    assert len(frame) == 67
+    assert frame["mood"].iloc[1] == 2.0
+
+def test_pipeline_export(pixeldb, context):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "smoothed.csv")
+        runner = StreamRunner([("smoothing", SmoothingStep({"points": 3, "export": path}, context))])
+        result, _ = _collect(runner, pixel_chunks(pixeldb, 10))
+        exported = pd.read_csv(path, index_col="date", parse_dates=True)
+    assert len(exported) == 67
+    np.testing.assert_allclose(exported["mood"], result["mood"])
+
+@pytest.mark.parametrize("buffer_size", [8, 1 << 16])
+def test_iter_array(buffer_size):
+    data = [{"date": f"2023-1-{i + 1}", "scores": [i % 5 + 1], "notes": "x" * i, "tags": []} for i in range(20)]
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(data, f, indent=2)
+    try:
+        assert list(jsonbackend.iter_array(f.name, buffer_size)) == data
+        chunks = list(json_file_chunks(f.name, 8))
+    finally:
+        os.remove(f.name)
+    assert [len(chunk) for chunk in chunks] == [8, 8, 4]
+    assert chunks[0].index[0] == pd.Timestamp("2023-01-01")
+
+def test_iter_array_empty_and_invalid():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.json")
+        with open(path, "w") as f:
+            f.write(" [ ] ")
+        assert list(jsonbackend.iter_array(path)) == []
+        with open(path, "w") as f:
+            f.write('{"a": 1}')
+        with pytest.raises(ValueError):
+            list(jsonbackend.iter_array(path))
+        with open(path, "w") as f:
+            f.write('[{"a": 1} {"b": 2}]')
+        with pytest.raises(ValueError):
+            list(jsonbackend.iter_array(path))
+
+def test_chunks_cut_between_days(context):
+    day = datetime.datetime(2015, 1, 1)
+    pixels = [Pixel(day + datetime.timedelta(days=i // 3), 1 + i % 5, "", {}, user=f"user{i % 3}") for i in range(30)]
+    chunks = list(pixel_chunks(PixelDb(pixels, []), 4))
+    assert [len(chunk) for chunk in chunks] == [6, 6, 6, 6, 6]
+    result, _ = _collect(StreamRunner([("interpolation", InterpolationStep({}, context))]), iter(chunks))
+    assert len(result) == 10
+
+def test_iter_array_value_at_buffer_end():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.json")
+        with open(path, "w") as f:
+            f.write("[123456, 7]")
+        assert list(jsonbackend.iter_array(path, buffer_size=4)) == [123456, 7]
+
+def test_iter_array_gives_up_on_invalid_json():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.json")
+        with open(path, "w") as f:
+            f.write('[{"a": 1}, {"b": oops} ' + " " * 10000 + "]")
+        values = jsonbackend.iter_array(path, buffer_size=16, max_value_size=64)
+        assert next(values) == {"a": 1}
+        with pytest.raises(ValueError, match="larger than 64"):
+            next(values)
+
+def test_streamed_file_filter_and_tagscore(context):
+    data = [{"date": f"2023-1-{i + 1}", "scores": [i % 5 + 1], "notes": "",
+             "tags": [{"type": "Emotions", "entries": ["sad" if i % 2 else "happiness"]}]} for i in range(20)]
+    query = PixelDbQuery().parse("WHERE DATE BETWEEN '2023-01-03' AND '2023-01-12' AND Emotions='sad'")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.json")
+        with open(path, "w") as f:
+            json.dump(data, f)
+        runner = StreamRunner([
+            ("tagscore", TagScoreStep({"scores": {"Emotions": {"sad": 1, "happiness": 5}}}, context.clone())),
+            ("interpolation", InterpolationStep({}, context.clone())),
+            ("onevar", OneVarStatsStep({}, context.clone())),
+        ])
+        result, stats = _collect(runner, json_file_chunks(path, 2, tags=True, query=query))
+    assert stats[0].rows_in == 5
+    assert list(result.index.strftime("%Y-%m-%d")) == [f"2023-01-{day:02d}" for day in range(4, 13)]
+    assert list(context["onevar"].columns) == ["mood", "Emotions"]
+    assert (result["Emotions"] == 1).all()
+
+def test_filter_pixels_stops_after_date_range():
+    def pixels():
+        for i in range(10):
+            if i > 5:
+                raise AssertionError("read past the end of the date range")
+            yield Pixel(datetime.datetime(2023, 1, 1 + i), 3, "", {})
+    query = PixelDbQuery().parse("WHERE DATE BETWEEN '2023-01-02' AND '2023-01-05'")
+    assert [p.date.day for p in filter_pixels(pixels(), query)] == [2, 3, 4, 5]
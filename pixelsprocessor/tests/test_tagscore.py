@@ -0,0 +1,73 @@
+import datetime
+import numpy as np
+import pytest
+from pixelsprocessor.data.categorical import Category, Tag
+from pixelsprocessor.data.pixel import Pixel
+from pixelsprocessor.data.pixeldb import PixelDb
+from pixelsprocessor.context import PixelProcessingContext
+from pixelsprocessor.step.chunks import pixel_chunks
+from pixelsprocessor.step.interpolation import InterpolationStep
+from pixelsprocessor.step.onevar import OneVarStatsStep
+from pixelsprocessor.step.runner import StreamRunner
+from pixelsprocessor.step.tagscore import TagScoreStep
+
+@pytest.fixture
+def pixeldb():
+    return PixelDb.from_json_str('''[
+        {"date": "2023-5-24", "type": "Mood", "scores": [3], "notes": "", "tags": [{"type": "Emotions", "entries": ["sad", "chill"]}, {"type": "Weather", "entries": ["rain"]}]},
+        {"date": "2023-5-23", "type": "Mood", "scores": [4], "notes": "", "tags": [{"type": "Emotions", "entries": ["happiness", "chill"]}]},
+        {"date": "2023-5-25", "type": "Mood", "scores": [2], "notes": "", "tags": []}
+    ]''')
+
+def test_pixeldb_tag_incidence(pixeldb):
+    incidence = pixeldb.tag_incidence()
+    assert incidence.tags == [("Emotions", "sad"), ("Emotions", "chill"), ("Weather", "rain"), ("Emotions", "happiness")]
+    assert list(incidence.pixel_ids) == [0, 0, 0, 1, 1]
+    assert list(incidence.tag_ids) == [0, 1, 2, 3, 1]
+
+def test_tagscore_check(pixeldb):
+    context = PixelProcessingContext(pixeldb, {})
+    assert TagScoreStep({"scores": {"Emotions": {"sad": 1}}}, context).check()
+    assert not TagScoreStep({}, context).check()
+    assert not TagScoreStep({"scores": {"Emotions": {"sad": "bad"}}}, context).check()
+    assert not TagScoreStep({"scores": {"Emotions": {"sad": 1}}, "aggregate": "median"}, context).check()
+
+@pytest.mark.parametrize("aggregate, expected", [("mean", [4.5, 2.5, np.nan]), ("sum", [9, 5, np.nan]), ("min", [4, 1, np.nan]), ("max", [5, 4, np.nan])])
+def test_tagscore_run(pixeldb, aggregate, expected):
+    context = PixelProcessingContext(pixeldb, {})
+    step = TagScoreStep({"scores": {"Emotions": {"happiness": 5, "chill": 4, "sad": 1}, "Weather": {"sun": 5}}, "aggregate": aggregate}, context)
+    frame = step.run()
+    assert list(frame.columns) == ["mood", "Emotions", "Weather"]
+    assert list(frame.index) == [datetime.datetime(2023, 5, 23), datetime.datetime(2023, 5, 24), datetime.datetime(2023, 5, 25)]
+    np.testing.assert_array_equal(frame["Emotions"].to_numpy(), expected)
+    assert frame["Weather"].isna().all()
+
+def test_tagscore_falls_back_to_tag_score():
+    weather = Category("Weather", [Tag("rain", score=2)])
+    db = PixelDb([Pixel(datetime.datetime(2023, 1, 1), 3, "", {weather: [weather.tags[0]]})], [weather])
+    frame = TagScoreStep({"scores": {"Weather": {"sun": 5}}}, PixelProcessingContext(db, {})).run()
+    assert frame["Weather"].tolist() == [2]
+
+def test_tagscore_columns_reach_later_steps(pixeldb):
+    context = PixelProcessingContext(pixeldb, {})
+    scores = {"scores": {"Emotions": {"happiness": 5, "chill": 4, "sad": 1}}}
+    runner = StreamRunner([
+        ("tagscore", TagScoreStep(scores, context.clone())),
+        ("interpolation", InterpolationStep({}, context.clone())),
+        ("onevar", OneVarStatsStep({}, context.clone())),
+    ])
+    runner.run(pixel_chunks(pixeldb, 1, tags=True))
+    onevar = context["onevar"]
+    assert list(onevar.columns) == ["mood", "Emotions"]
+    # The day without tags is filled in by interpolation (carried forward past the last scored day)
+    assert onevar.loc["count", "Emotions"] == 3
+    assert onevar.loc["mean", "Emotions"] == pytest.approx((4.5 + 2.5 + 2.5) / 3)
+
+def test_tagscore_needs_tags(pixeldb):
+    context = PixelProcessingContext(pixeldb, {})
+    runner = StreamRunner([
+        ("interpolation", InterpolationStep({}, context.clone())),
+        ("tagscore", TagScoreStep({"scores": {"Emotions": {"sad": 1}}}, context.clone())),
+    ])
+    with pytest.raises(ValueError):
+        runner.run(pixel_chunks(pixeldb, tags=True))
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import datetime
+import numpy as np
+import pytest
+from pixelsprocessor.data.pixel import Pixel
+from pixelsprocessor.data.pixeldb import PixelDb
+from pixelsprocessor.output import timeline
+
+def _db(days, start=datetime.datetime(2020, 1, 1)):
+    return PixelDb([Pixel(start + datetime.timedelta(days=i), 1 + i % 5, "", {}) for i in reversed(range(days))], [])
+
+def test_mood_series_sorted():
+    x, y = timeline.mood_series(_db(10))
+    assert np.all(np.diff(x) == 1)
+    assert list(y[:6]) == [1, 2, 3, 4, 5, 1]
+    assert str(timeline.to_datetime64(x[:1])[0].astype('datetime64[D]')) == "2020-01-01"
+
+def test_mood_series_averages_users():
+    day = datetime.datetime(2020, 1, 1)
+    db = PixelDb([Pixel(day + datetime.timedelta(days=i), mood, "", {}, user=user)
+                  for user, mood in (("alice", 1), ("bob", 5)) for i in range(10)], [])
+    x, y = timeline.mood_series(db)
+    assert len(x) == 10
+    assert np.all(y == 3)
+    split = timeline.split_by_user(db)
+    assert sorted(split) == ["alice", "bob"]
+    assert np.all(timeline.mood_series(split["bob"])[1] == 5)
+    assert list(timeline.split_by_user(_db(3))) == [timeline.DEFAULT_USER]
+
+def test_bucket_count():
+    assert timeline.bucket_count(80, 1000) == 80
+    assert timeline.bucket_count(80, 10) == 10
+
+def test_downsample_minmax():
+    x = np.arange(10, dtype=float)
+    y = np.array([1, 5, 2, 2, 3, 3, 4, 1, 5, 5], dtype=float)
+    buckets = timeline.downsample_minmax(x, y, 2)
+    assert list(buckets.x) == [2, 7]
+    assert list(buckets.low) == [1, 1]
+    assert list(buckets.high) == [5, 5]
+    assert list(buckets.mean) == [2.6, 3.6]
+
+def test_downsample_lttb():
+    x = np.arange(100, dtype=float)
+    y = np.full(100, 3.0)
+    y[42] = 5
+    xs, ys = timeline.downsample_lttb(x, y, 10)
+    assert len(xs) == 10
+    assert xs[0] == 0 and xs[-1] == 99
+    assert 42 in xs
+    assert np.all(np.diff(xs) > 0)
+    # Nothing to do when the series already fits
+    assert len(timeline.downsample_lttb(x, y, 200)[0]) == 100
+
+def test_console_timeline_fits_width():
+    x, y = timeline.mood_series(_db(3650))
+    line = timeline.console_timeline(x, y, 80)
+    assert len(line) == 80
+    assert line.startswith("2020-01-01 ")
+
+@pytest.mark.parametrize("method", timeline.DOWNSAMPLE_METHODS)
+def test_render_timelines(method):
+    dbs = {"alice": _db(400), "bob": _db(50)}
+    with tempfile.TemporaryDirectory() as out_dir:
+        paths = timeline.render_timelines(dbs, out_dir, method=method, max_workers=2)
+        assert sorted(paths) == ["alice", "bob"]
+        for path in paths.values():
+            assert os.path.getsize(path) > 0
@@ -14,6 +14,7 @@ setup(
     url='https://github.com/snorklerjoe/PixelsJournal-data-processing',
     packages=find_packages(),
     install_requires=[
+        'numpy',
         'pandas',
         'matplotlib',
         'scipy',